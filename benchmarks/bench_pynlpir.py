@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for PyNLPIR.
+
+Measures import time, :func:`pynlpir.open`/:func:`pynlpir.close`,
+:func:`pynlpir.segment` (with each *pos_names* mode),
+:func:`pynlpir.get_key_words`, and :func:`pynlpir.pos_map.get_pos_name` using
+synthetic Chinese texts of different sizes. Only the bundled ``Data``
+directory is needed; nothing is downloaded.
+
+Run it from the repository's root directory::
+
+    python benchmarks/bench_pynlpir.py
+    python benchmarks/bench_pynlpir.py --sizes small medium --repeat 5
+
+If NLPIR can't be initialized (e.g. the license is missing), only the
+benchmarks that don't need NLPIR are run.
+
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+import pynlpir
+from pynlpir import pos_map
+
+#: Sentences used to build the synthetic corpora.
+SENTENCES = (
+    "我们都是美国人。",
+    "这个句子有空格。",
+    "转发微博，霸气全露！",
+    "新增了十二种新类型毒品的定罪量刑数量标准。",
+    "下调了在我国危害较为严重的毒品的定罪量刑数量标准。",
+    "北京是中华人民共和国的首都，也是全国的政治和文化中心。",
+    "今天天气很好，我们一起去公园散步吧？",
+    "自然语言处理是计算机科学和人工智能的一个重要方向。",
+)
+
+#: The approximate number of characters in each synthetic corpus.
+SIZES = {"small": 100, "medium": 10000, "large": 1000000}
+
+#: Part of speech codes used by the part of speech name benchmark.
+POS_CODES = ("n", "nsf", "rr", "vshi", "wj", "d", "Rg", "ude1", "m", "qv")
+
+
+def make_text(size, seed=0):
+    """Builds a synthetic Chinese text with about *size* characters."""
+    rng = random.Random(seed)
+    sentences, length = [], 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        sentences.append(sentence)
+        length += len(sentence)
+    return "".join(sentences)
+
+
+def timeit(func, repeat):
+    """Calls *func* *repeat* times and returns the best time and last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(name, seconds, chars=None, tokens=None):
+    """Prints one benchmark result."""
+    line = "{0:<40} {1:>10.3f} ms".format(name, seconds * 1000)
+    if chars is not None:
+        line += " {0:>14,.0f} chars/s".format(chars / seconds)
+    if tokens is not None:
+        line += " {0:>14,.0f} tokens/s".format(tokens / seconds)
+    print(line)
+
+
+def bench_import(repeat):
+    """Benchmarks ``import pynlpir`` in a fresh interpreter."""
+    # Make sure the child interpreters import the same copy of PyNLPIR.
+    path = os.path.dirname(os.path.dirname(os.path.abspath(pynlpir.__file__)))
+    env = dict(os.environ, PYTHONPATH=path)
+
+    def run(code):
+        return subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    baseline, _ = timeit(lambda: run("pass"), repeat)
+    seconds, _ = timeit(lambda: run("import pynlpir"), repeat)
+    report("import pynlpir", max(seconds - baseline, 0.0))
+    seconds, _ = timeit(lambda: run("import pynlpir.pos_map"), repeat)
+    report("import pynlpir.pos_map", max(seconds - baseline, 0.0))
+
+
+def bench_open_close(repeat):
+    """Benchmarks :func:`pynlpir.open` and :func:`pynlpir.close`."""
+    open_times, close_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pynlpir.open()
+        middle = time.perf_counter()
+        pynlpir.close()
+        open_times.append(middle - start)
+        close_times.append(time.perf_counter() - middle)
+    report("open()", min(open_times))
+    report("close()", min(close_times))
+
+
+def bench_pos_map(repeat, number=100000):
+    """Benchmarks :func:`pynlpir.pos_map.get_pos_name`."""
+    codes = [POS_CODES[i % len(POS_CODES)] for i in range(number)]
+    for name in ("parent", "child", "all", "raw"):
+
+        def run():
+            for code in codes:
+                pos_map.get_pos_name(code, name)
+
+        seconds, _ = timeit(run, repeat)
+        report("pos_map.get_pos_name({0!r})".format(name), seconds, tokens=number)
+
+
+def bench_nlpir(sizes, repeat):
+    """Benchmarks the functions that need NLPIR."""
+    for size in sizes:
+        text = make_text(SIZES[size])
+        chars = len(text)
+        print("\n{0} corpus ({1:,} characters)".format(size, chars))
+        seconds, tokens = timeit(lambda: pynlpir.segment(text, False), repeat)
+        report("segment(pos_tagging=False)", seconds, chars, len(tokens))
+        for pos_names in (None, "raw", "parent", "child", "all"):
+            seconds, tokens = timeit(
+                lambda: pynlpir.segment(text, pos_names=pos_names), repeat
+            )
+            name = "segment(pos_names={0!r})".format(pos_names)
+            report(name, seconds, chars, len(tokens))
+        seconds, _ = timeit(lambda: pynlpir.get_key_words(text), repeat)
+        report("get_key_words()", seconds, chars)
+        seconds, _ = timeit(lambda: pynlpir.get_key_words(text, weighted=True), repeat)
+        report("get_key_words(weighted=True)", seconds, chars)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for PyNLPIR.")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=sorted(SIZES),
+        default=["small", "medium", "large"],
+        help="The corpus sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="How many times to run each benchmark (the best time is shown).",
+    )
+    args = parser.parse_args(argv)
+
+    print("PyNLPIR {0}, Python {1}".format(pynlpir.__version__, sys.version.split()[0]))
+    data_dir = os.path.join(pynlpir.nlpir.PACKAGE_DIR, "Data")
+    print("Data directory: {0}\n".format(data_dir))
+    bench_import(args.repeat)
+    bench_pos_map(args.repeat)
+    try:
+        bench_open_close(args.repeat)
+        pynlpir.open()
+    except (RuntimeError, pynlpir.LicenseError) as e:
+        print("\nSkipping NLPIR benchmarks: {0}".format(e))
+        return
+    try:
+        bench_nlpir(args.sizes, args.repeat)
+    finally:
+        pynlpir.close()
+
+
+if __name__ == "__main__":
+    main()
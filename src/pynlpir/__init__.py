@@ -17,11 +17,21 @@ the API.
 
 """
 
+import array
+import codecs
+import collections
+import collections.abc
+import ctypes
 import datetime as dt
 import logging
 import os
+import sys
+import tempfile
+import threading
+import time
 
 from . import nlpir, pos_map
+from .stats import Stats
 
 __version__ = "0.6.1"
 
@@ -35,6 +45,68 @@ ENCODING = "utf_8"
 #: The encoding error handling scheme configured by :func:`open`.
 ENCODING_ERRORS = "strict"
 
+#: The default maximum length of the pieces of text that :func:`split_text`
+#: creates.
+MAX_CHUNK = 10000
+
+# The characters that split_text() prefers to split text after.
+_SENTENCE_ENDS = ("。", "！", "？", "\n")
+
+#: A segmented word returned by :func:`segment_spans`. *start* and *length*
+#: locate the word in the source text, *pos* is NLPIR's part of speech code
+#: (or :data:`None`), *word_type* is ``1`` if the word is from the user
+#: dictionary and *weight* is the word's weight.
+Span = collections.namedtuple("Span", "start length pos word_type weight")
+
+
+class FileStats(
+    collections.namedtuple("FileStats", "source result bytes tokens seconds")
+):
+    """Statistics for a file processed by :func:`process_file`.
+
+    *source* and *result* are the file names, *bytes* is the size of the
+    source file, *tokens* is the number of segmented words (or :data:`None` if
+    they weren't counted), and *seconds* is how long NLPIR took to process the
+    file.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def bytes_per_second(self):
+        """The number of source bytes processed per second."""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    @property
+    def tokens_per_second(self):
+        """The number of tokens produced per second."""
+        if self.tokens is None:
+            return None
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+
+#: Key words returned by :func:`get_key_word_matrix` as a sparse matrix in
+#: compressed sparse row format. Row *i* holds the weights of document *i*'s
+#: key words: their columns are ``indices[indptr[i]:indptr[i + 1]]`` and their
+#: weights are ``weights[indptr[i]:indptr[i + 1]]``. *vocabulary* maps each
+#: word to its column.
+KeyWordMatrix = collections.namedtuple(
+    "KeyWordMatrix", "vocabulary indptr indices weights"
+)
+
+#: A new word found by :class:`NewWordDiscovery`: the *word*, its part of
+#: speech code *pos*, and its *weight*.
+NewWord = collections.namedtuple("NewWord", "word pos weight")
+
+#: The counts returned by :func:`add_user_words`: the *total* number of
+#: entries given, the number of *unique* words, and the number of words NLPIR
+#: *added* to the user dictionary.
+UserWordCounts = collections.namedtuple("UserWordCounts", "total unique added")
+
+#: Information about the result cache returned by :func:`cache_info`.
+CacheInfo = collections.namedtuple("CacheInfo", "hits misses maxsize currsize")
+
 
 class LicenseError(Exception):
     """A custom exception for missing/invalid license errors."""
@@ -42,6 +114,203 @@ class LicenseError(Exception):
     pass
 
 
+class _ResultCache:
+    """A bounded, least recently used cache of segmentation results.
+
+    It's safe to use from multiple threads.
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Each result is stored with the custom part of speech map it was
+        # created with (or None).
+        self._results = collections.OrderedDict()
+        # Keys use the id() of custom part of speech maps, so keep the maps
+        # alive for as long as their results are cached. This maps a map's
+        # id() to the map and the number of cached results that use it.
+        self._pos_tags = {}
+
+    def get(self, key):
+        """Gets the result for *key* or :data:`None` if it isn't cached."""
+        with self._lock:
+            try:
+                result, _ = self._results[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result, pos_tags=None):
+        """Caches *result* for *key*, evicting the oldest result if needed.
+
+        *pos_tags* is the part of speech map whose :func:`id` is part of
+        *key*, if any.
+
+        """
+        with self._lock:
+            old = self._results.pop(key, None)
+            if old is not None:
+                self._release(old[1])
+            self._results[key] = (result, pos_tags)
+            if pos_tags is not None:
+                entry = self._pos_tags.setdefault(id(pos_tags), [pos_tags, 0])
+                entry[1] += 1
+            if len(self._results) > self.maxsize:
+                _, (_, old_pos_tags) = self._results.popitem(last=False)
+                self._release(old_pos_tags)
+
+    def _release(self, pos_tags):
+        """Forgets *pos_tags* once no cached result uses it."""
+        if pos_tags is None:
+            return
+        entry = self._pos_tags[id(pos_tags)]
+        entry[1] -= 1
+        if not entry[1]:
+            del self._pos_tags[id(pos_tags)]
+
+    def clear(self):
+        """Removes every cached result."""
+        with self._lock:
+            self._results.clear()
+            self._pos_tags.clear()
+
+    def info(self):
+        """Gets the cache's statistics as a :data:`CacheInfo` instance."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+
+
+# The result cache used by segment() and get_key_words(). See enable_cache().
+_cache = None
+
+# The profiling statistics recorded by the functions below. See enable_stats().
+_stats = None
+
+# The result buffer reused by _iter_spans(). It's taken while it's in use, so
+# a call made while another call's words are being read gets its own buffer.
+_result_buffer = None
+
+# The maximum number of results a buffer can hold and still be reused. Larger
+# buffers are freed, so one long text doesn't keep its memory allocated.
+_MAX_RESULT_BUFFER = 65536
+
+
+class Tokens(collections.abc.Sequence):
+    """A compact, read-only sequence of segmented words.
+
+    This is returned by :func:`segment_tokens`. Indexing and iterating return
+    ``(word, pos)`` tuples like the lists returned by :func:`segment`, but they
+    are created on demand. A :class:`Tokens` instance only stores the
+    segmented text once, the *starts* and *lengths* of the words in it, and
+    their part of speech IDs (*pos_ids*), each in an :mod:`array` of integers.
+    This uses much less memory than a list of tuples of strings when many
+    segmented texts are kept at once.
+
+    :ivar text: The segmented text. If it's encoded, *starts* and *lengths*
+        are byte offsets and words are decoded when they are accessed.
+    :ivar starts: The start offset of each word in *text*.
+    :ivar lengths: The length of each word in *text*.
+    :ivar pos_ids: The ID of each word's part of speech code (see
+        :func:`pynlpir.pos_map.get_pos_id`). Use :meth:`pos_code` to get the
+        code.
+
+    """
+
+    __slots__ = (
+        "text",
+        "starts",
+        "lengths",
+        "pos_ids",
+        "pos_names",
+        "pos_english",
+        "pos_tags",
+    )
+
+    def __init__(
+        self,
+        text,
+        starts,
+        lengths,
+        pos_ids,
+        pos_names="parent",
+        pos_english=True,
+        pos_tags=pos_map.POS_MAP,
+    ):
+        self.text = text
+        self.starts = starts
+        self.lengths = lengths
+        self.pos_ids = pos_ids
+        self.pos_names = pos_names
+        self.pos_english = pos_english
+        self.pos_tags = pos_tags
+
+    def __len__(self):
+        return len(self.starts)
+
+    def word(self, i):
+        """Gets the word at index *i*."""
+        start = self.starts[i]
+        end = start + self.lengths[i]
+        word = self.text[start:end]
+        return word if isinstance(word, str) else _decode(word)
+
+    def pos_code(self, i):
+        """Gets the part of speech code of the word at index *i*."""
+        return pos_map.POS_CODES[self.pos_ids[i]]
+
+    def pos(self, i):
+        """Gets the part of speech name of the word at index *i*.
+
+        The name depends on the *pos_names*, *pos_english*, and *pos_tags*
+        arguments given to :func:`segment_tokens`.
+
+        """
+        code = pos_map.POS_CODES[self.pos_ids[i]]
+        if code is None or self.pos_names is None:
+            return code
+        return _get_pos_name(
+            code, self.pos_names, self.pos_english, pos_tags=self.pos_tags
+        )
+
+    def words(self):
+        """Gets a list of the words without their parts of speech."""
+        text, decode = self.text, not isinstance(self.text, str)
+        bounds = ((s, s + n) for s, n in zip(self.starts, self.lengths))
+        words = [text[start:end] for start, end in bounds]
+        return [_decode(w) for w in words] if decode else words
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return (self.word(i), self.pos(i))
+
+    def __iter__(self):
+        if self.pos_names is None:
+            codes = pos_map.POS_CODES
+            names = [codes[pos_id] for pos_id in self.pos_ids]
+        else:
+            names = _get_pos_names(
+                self.pos_ids, self.pos_names, self.pos_english, pos_tags=self.pos_tags
+            )
+        return zip(self.words(), names)
+
+    def __eq__(self, other):
+        if isinstance(other, (Tokens, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Tokens({0!r})".format(list(self))
+
+
 def open(
     data_dir=nlpir.PACKAGE_DIR,
     encoding=ENCODING,  # noqa: A001
@@ -104,6 +373,7 @@ def open(
     if isinstance(license_code, str):
         license_code = _encode(license_code)
 
+    clear_cache()
     if not nlpir.Init(data_dir, encoding_constant, license_code):
         _attempt_to_raise_license_error(data_dir)
         raise RuntimeError("NLPIR function 'NLPIR_Init' failed.")
@@ -118,12 +388,196 @@ def close():
 
     """
     logger.debug("Exiting the NLPIR API.")
+    clear_cache()
     if not nlpir.Exit():
         logger.warning("NLPIR function 'NLPIR_Exit' failed.")
     else:
         logger.debug("NLPIR API exited.")
 
 
+def enable_cache(maxsize=1024):
+    """Caches the results of :func:`segment` and :func:`get_key_words`.
+
+    Results are cached by their arguments; custom part of speech maps are
+    compared by identity. Once *maxsize* results are cached, the least
+    recently used result is discarded. Calling this again replaces the cache
+    with an empty one. The cache can be used from multiple threads.
+
+    The cache is cleared by :func:`open`, :func:`close`, and the functions in
+    this module that change the user dictionary (e.g. :func:`add_user_word`).
+    If you change the user dictionary using :mod:`pynlpir.nlpir` directly, call
+    :func:`clear_cache` afterwards.
+
+    :param int maxsize: The maximum number of results to cache (defaults to
+        ``1024``).
+
+    """
+    global _cache
+    logger.debug("Enabling result cache: 'maxsize': {0}.".format(maxsize))
+    _cache = _ResultCache(maxsize)
+
+
+def disable_cache():
+    """Stops caching results and discards the cache."""
+    global _cache
+    _cache = None
+
+
+def clear_cache():
+    """Removes every cached result (if caching is enabled)."""
+    cache = _cache
+    if cache is not None:
+        cache.clear()
+
+
+def cache_info():
+    """Gets the result cache's statistics.
+
+    :returns: A :data:`CacheInfo` instance with the fields *hits*, *misses*,
+        *maxsize*, and *currsize*, or :data:`None` if caching isn't enabled.
+
+    """
+    cache = _cache
+    return None if cache is None else cache.info()
+
+
+def enable_stats(stats=None):
+    """Records profiling statistics of the functions in this module.
+
+    Once enabled, :func:`segment`, :func:`segment_many`, :func:`segment_spans`
+    (and so :func:`segment_file`), :func:`segment_tokens`,
+    :func:`get_key_words`, and :func:`process_file` record the time spent in
+    each phase of every call (e.g. ``'encode'``, ``'nlpir'``, and
+    ``'format'``), the number of bytes passed to and returned by NLPIR, and
+    the number of tokens produced. Calls to :func:`segment_many` are recorded
+    as ``'segment'``. Results returned from the cache aren't recorded.
+
+    :param stats: The :class:`pynlpir.stats.Stats` instance to record the
+        statistics in (defaults to a new instance).
+    :returns: The :class:`pynlpir.stats.Stats` instance.
+
+    """
+    global _stats
+    _stats = Stats() if stats is None else stats
+    return _stats
+
+
+def disable_stats():
+    """Stops recording profiling statistics."""
+    global _stats
+    _stats = None
+
+
+def get_stats():
+    """Gets the profiling statistics enabled by :func:`enable_stats`.
+
+    :returns: A :class:`pynlpir.stats.Stats` instance, or :data:`None` if
+        profiling statistics aren't recorded.
+
+    """
+    return _stats
+
+
+def add_user_word(word, pos=None):
+    """Adds *word* to the user dictionary.
+
+    This calls the function :func:`~pynlpir.nlpir.AddUserWord` and clears the
+    result cache.
+
+    :param str word: The word to add.
+    :param str pos: The word's part of speech code, e.g. ``'n'``.
+    :returns: Whether or not the word was added.
+
+    """
+    entry = word if pos is None else "{0} {1}".format(word, pos)
+    clear_cache()
+    return bool(nlpir.AddUserWord(_encode(entry)))
+
+
+def delete_user_word(word):
+    """Deletes *word* from the user dictionary.
+
+    This calls the function :func:`~pynlpir.nlpir.DelUsrWord` and clears the
+    result cache.
+
+    :param str word: The word to delete.
+    :returns: Whether or not the word was in the user dictionary.
+
+    """
+    clear_cache()
+    return nlpir.DelUsrWord(_encode(word)) != -1
+
+
+def import_user_dict(filename):
+    """Imports a user dictionary from the text file *filename*.
+
+    Each line of the file is a word, optionally followed by a space and its
+    part of speech code. This calls the function
+    :func:`~pynlpir.nlpir.ImportUserDict` and clears the result cache.
+
+    :param str filename: The user dictionary file.
+    :returns: The number of words imported.
+
+    """
+    clear_cache()
+    return nlpir.ImportUserDict(_encode_path(filename))
+
+
+def add_user_words(words, save=False, import_threshold=1000):
+    """Adds each word in *words* to the user dictionary.
+
+    Duplicate words are skipped (the first entry for a word is used). If there
+    are fewer than *import_threshold* unique words, they're added one at a time
+    with :func:`~pynlpir.nlpir.AddUserWord`. Otherwise, they're written to a
+    temporary file that is loaded with :func:`~pynlpir.nlpir.ImportUserDict`,
+    which is much faster for large dictionaries.
+
+    The result cache is cleared.
+
+    :param words: An iterable of words. Each item is either a string
+        containing a word, optionally followed by a space and its part of
+        speech code (e.g. ``'美国人 n'``), or a tuple ``(word, pos)``. Byte
+        strings are decoded using :data:`ENCODING`.
+    :param bool save: Whether or not to save the user dictionary to disk
+        afterwards with :func:`~pynlpir.nlpir.SaveTheUsrDic` (defaults to
+        ``False``).
+    :param int import_threshold: The number of unique words at which the
+        words are imported from a temporary file (defaults to ``1000``).
+    :returns: A :data:`UserWordCounts` instance.
+
+    """
+    entries = {}
+    total = 0
+    for entry in words:
+        total += 1
+        if isinstance(entry, (str, bytes)):
+            entry = _decode(entry).split(None, 1)
+        if not entry:
+            continue
+        word = _decode(entry[0])
+        if word not in entries:
+            pos = _decode(entry[1]) if len(entry) > 1 else None
+            entries[word] = word if not pos else "{0} {1}".format(word, pos)
+    clear_cache()
+    logger.debug(
+        "Adding {0} unique user words ({1} given).".format(len(entries), total)
+    )
+    if len(entries) < import_threshold:
+        added = 0
+        for entry in entries.values():
+            added += bool(nlpir.AddUserWord(_encode(entry)))
+    else:
+        with tempfile.NamedTemporaryFile("wb", suffix=".txt", delete=False) as f:
+            f.write(_encode("\n".join(entries.values()) + "\n"))
+        try:
+            added = nlpir.ImportUserDict(_encode_path(f.name))
+        finally:
+            os.remove(f.name)
+    if save and not nlpir.SaveTheUsrDic():
+        raise RuntimeError("NLPIR function 'NLPIR_SaveTheUsrDic' failed.")
+    return UserWordCounts(total, len(entries), added)
+
+
 def _attempt_to_raise_license_error(data_dir):
     """Raise an error if NLPIR has detected a missing or expired license.
 
@@ -178,6 +632,105 @@ def _encode(s, encoding=None, errors=None):
     return s.encode(encoding, errors) if isinstance(s, str) else s
 
 
+def _strip(s):
+    """Strips leading and trailing whitespace from *s*.
+
+    Returns the stripped text and the number of characters (or bytes, if *s*
+    is encoded) that were stripped from its start.
+
+    If *s* is encoded using UTF-8, it is stripped without being decoded: only
+    the characters at each end are decoded to check for non-ASCII whitespace,
+    e.g. ``'\u3000'``.
+
+    """
+    if isinstance(s, str):
+        stripped = s.lstrip()
+        return stripped.rstrip(), len(s) - len(stripped)
+    if codecs.lookup(ENCODING).name == "utf-8":
+        # bytes.strip() only strips ASCII whitespace. A UTF-8 character is at
+        # most 4 bytes long, so decoding 4 bytes at each end is enough to find
+        # any other whitespace.
+        stripped = s.strip()
+        head = stripped[:4].decode("utf_8", "ignore")
+        tail = stripped[-4:].decode("utf_8", "ignore")
+        if not (head[:1].isspace() or tail[-1:].isspace()):
+            return stripped, len(s) - len(s.lstrip())
+    text = _decode(s)
+    stripped = text.lstrip()
+    offset = len(_encode(text[: len(text) - len(stripped)]))
+    return _encode(stripped.rstrip()), offset
+
+
+def split_text(s, max_chunk=MAX_CHUNK):
+    """Splits the Chinese text *s* into pieces of at most *max_chunk* length.
+
+    Each piece ends after the last sentence-final punctuation mark (``'。'``,
+    ``'！'``, or ``'？'``) or newline that fits in it. A sentence longer than
+    *max_chunk* is split wherever the limit falls.
+
+    This is a generator that yields ``(start, piece)`` tuples, where *start* is
+    the offset of *piece* in *s*. If *s* is a string, *max_chunk* and *start*
+    count characters; if *s* is encoded, they count bytes and pieces never
+    end in the middle of a character.
+
+    :param s: The Chinese text to split. *s* should be Unicode or a UTF-8
+        encoded string.
+    :param int max_chunk: The maximum length of each piece (defaults to
+        :data:`MAX_CHUNK`).
+
+    """
+    if max_chunk < 1:
+        raise ValueError("max_chunk must be at least 1.")
+    if not isinstance(s, str) and codecs.lookup(ENCODING).name != "utf-8":
+        # Multibyte encodings like GBK can contain the bytes of a punctuation
+        # mark inside other characters, so split the decoded text instead.
+        offset = 0
+        for piece in _split_decoded(_decode(s), max_chunk, max_chunk):
+            yield offset, piece
+            offset += len(piece)
+        return
+    is_str = isinstance(s, str)
+    ends = _SENTENCE_ENDS if is_str else [c.encode("utf_8") for c in _SENTENCE_ENDS]
+    start, length = 0, len(s)
+    while length - start > max_chunk:
+        limit = start + max_chunk
+        cut = start
+        for end in ends:
+            position = s.rfind(end, start, limit)
+            if position != -1:
+                cut = max(cut, position + len(end))
+        if cut == start:
+            cut = limit
+            if not is_str:
+                # Don't split a UTF-8 character: move back to its first byte.
+                while cut > start and 0x80 <= s[cut] < 0xC0:
+                    cut -= 1
+                if cut == start:
+                    cut = limit
+        yield start, s[start:cut]
+        start = cut
+    if start < length:
+        yield start, s[start:]
+
+
+def _split_decoded(s, max_chunk, max_chars):
+    """Splits the string *s* into encoded pieces of at most *max_chunk* bytes.
+
+    *s* is split into pieces of at most *max_chars* characters first. Pieces
+    whose encoded form is too long are split again with a smaller limit, so
+    that the pieces still end after sentences where possible. A single
+    character is never split.
+
+    """
+    for _, piece in split_text(s, max_chars):
+        encoded = _encode(piece)
+        if len(encoded) <= max_chunk or len(piece) == 1:
+            yield encoded
+        else:
+            max_piece_chars = max(1, len(piece) * max_chunk // len(encoded))
+            yield from _split_decoded(piece, max_chunk, max_piece_chars)
+
+
 def _to_float(s):
     """Converts *s* to a float if possible; if not, returns `False`."""
     try:
@@ -201,8 +754,47 @@ def _get_pos_name(
     return delimiter.join(pos_name) if name == "all" else pos_name
 
 
+def _get_pos_names(
+    codes, name="parent", english=True, delimiter=":", pos_tags=pos_map.POS_MAP
+):
+    """Gets the part of speech name for each code (or code ID) in *codes*.
+
+    Joins the names together with *delimiter* if *name* is ``'all'``.
+
+    See :func:``pynlpir.pos_map.get_pos_names`` for more information.
+
+    """
+    pos_names = pos_map.get_pos_names(codes, name, english, pos_tags=pos_tags)
+    if name == "all":
+        joined = {n: delimiter.join(n) for n in set(pos_names) if n is not None}
+        pos_names = [joined.get(n) for n in pos_names]
+    return pos_names
+
+
+def _format_tokens(result, pos_tagging, pos_names, pos_english, pos_tags):
+    """Formats NLPIR's segmented text *result* as a list of tokens.
+
+    Part of speech names are looked up for all of the tokens at once.
+
+    """
+    tokens = result.strip().replace("  ", " ").split(" ")
+    tokens = [" " if t == "" else t for t in tokens]
+    if pos_tagging:
+        tokens = [t.rsplit("/", 1) for t in tokens]
+        codes = [t[1] if len(t) == 2 else None for t in tokens]
+        if pos_names is not None:
+            codes = _get_pos_names(codes, pos_names, pos_english, pos_tags=pos_tags)
+        tokens = [(t[0], pos) for t, pos in zip(tokens, codes)]
+    return tokens
+
+
 def segment(
-    s, pos_tagging=True, pos_names="parent", pos_english=True, pos_tags=pos_map.POS_MAP
+    s,
+    pos_tagging=True,
+    pos_names="parent",
+    pos_english=True,
+    pos_tags=pos_map.POS_MAP,
+    max_chunk=None,
 ):
     """Segment Chinese text *s* using NLPIR.
 
@@ -216,7 +808,9 @@ def segment(
     be returned as :data:`None` (e.g. a space returns as ``(' ', None)``).
 
     This uses the function :func:`~pynlpir.nlpir.ParagraphProcess` to segment
-    *s*.
+    *s*. If *s* is already encoded, it is passed to NLPIR without being decoded
+    and encoded again. To avoid decoding the result as well, use
+    :func:`segment_spans`.
 
     :param s: The Chinese text to segment. *s* should be Unicode or a UTF-8
         encoded string.
@@ -238,36 +832,120 @@ def segment(
         of speech names, e.g. ``'conjunction'`` or ``'连词'``. Defaults to
         ``True``. This is only used if *pos_tagging* is ``True``.
     :param dict pos_tags: Custom part of speech tags to use.
+    :param int max_chunk: If given, *s* is split into pieces of at most this
+        length by :func:`split_text` and each piece is segmented separately.
+        This bounds how long each call to NLPIR takes and how much memory it
+        uses for very long texts. Whitespace between pieces isn't included in
+        the result.
 
     """
-    s = _decode(s)
-    s = s.strip()
-    logger.debug(
-        "Segmenting text with{0} POS tagging: {1}.".format(
-            "" if pos_tagging else "out", s
+    if max_chunk is not None:
+        tokens = []
+        for _, piece in split_text(s, max_chunk):
+            if piece.strip():
+                tokens.extend(
+                    segment(piece, pos_tagging, pos_names, pos_english, pos_tags)
+                )
+        return tokens
+    # Read the cache once, since another thread can replace it.
+    cache = _cache
+    if cache is not None:
+        key = (
+            "segment",
+            s,
+            pos_tagging,
+            pos_names,
+            pos_english,
+            id(pos_tags),
         )
-    )
-    result = nlpir.ParagraphProcess(_encode(s), pos_tagging)
+        cached = cache.get(key)
+        if cached is not None:
+            return list(cached)
+    # Formatting the whole text for debug messages is expensive, so only do
+    # it when debug logging is enabled.
+    debug = logger.isEnabledFor(logging.DEBUG)
+    timer = None if _stats is None else _stats.timer("segment")
+    # Encoded text is passed to NLPIR as is, without being decoded and encoded
+    # again.
+    s = _encode(_strip(s)[0])
+    if debug:
+        logger.debug(
+            "Segmenting text with{0} POS tagging: {1}.".format(
+                "" if pos_tagging else "out", _decode(s)
+            )
+        )
+    if timer is not None:
+        timer.phase("encode")
+    result = nlpir.ParagraphProcess(s, pos_tagging)
+    if timer is not None:
+        timer.phase("nlpir")
+        bytes_out = len(result)
     result = _decode(result)
-    logger.debug("Finished segmenting text: {0}.".format(result))
-    logger.debug("Formatting segmented text.")
-    tokens = result.strip().replace("  ", " ").split(" ")
-    tokens = [" " if t == "" else t for t in tokens]
-    if pos_tagging:
-        for i, t in enumerate(tokens):
-            token = tuple(t.rsplit("/", 1))
-            if len(token) == 1:
-                token = (token[0], None)
-            if pos_names is not None and token[1] is not None:
-                pos_name = _get_pos_name(
-                    token[1], pos_names, pos_english, pos_tags=pos_tags
-                )
-                token = (token[0], pos_name)
-            tokens[i] = token
-    logger.debug("Formatted segmented text: {0}.".format(tokens))
+    if debug:
+        logger.debug("Finished segmenting text: {0}.".format(result))
+        logger.debug("Formatting segmented text.")
+    tokens = _format_tokens(result, pos_tagging, pos_names, pos_english, pos_tags)
+    if debug:
+        logger.debug("Formatted segmented text: {0}.".format(tokens))
+    if timer is not None:
+        timer.phase("format")
+        timer.record(len(s), bytes_out, len(tokens))
+    if cache is not None:
+        cache.put(key, tuple(tokens), pos_tags)
     return tokens
 
 
+def segment_many(
+    docs,
+    pos_tagging=True,
+    pos_names="parent",
+    pos_english=True,
+    pos_tags=pos_map.POS_MAP,
+):
+    """Segment each Chinese text in *docs* using NLPIR.
+
+    This is a generator that yields one list of tokens for each item of
+    *docs*, in order. Each list is the same as what :func:`segment` returns
+    for that item, but the encoding settings are looked up once for the whole
+    batch instead of once per text.
+
+    :param docs: An iterable (e.g. a list or a generator) of Chinese texts to
+        segment. Each text should be Unicode or a UTF-8 encoded string.
+
+    See :func:`segment` for a description of the other arguments.
+
+    """
+    encoding, errors = ENCODING, ENCODING_ERRORS
+    paragraph_process = nlpir.ParagraphProcess
+    logger.debug(
+        "Segmenting texts with{0} POS tagging.".format("" if pos_tagging else "out")
+    )
+    count = 0
+    for s in docs:
+        timer = None if _stats is None else _stats.timer("segment")
+        s = _strip(s)[0]
+        if isinstance(s, str):
+            s = s.encode(encoding, errors)
+        if timer is not None:
+            timer.phase("encode")
+        result = paragraph_process(s, pos_tagging)
+        if timer is not None:
+            timer.phase("nlpir")
+        tokens = _format_tokens(
+            result.decode(encoding, errors),
+            pos_tagging,
+            pos_names,
+            pos_english,
+            pos_tags,
+        )
+        if timer is not None:
+            timer.phase("format")
+            timer.record(len(s), len(result), len(tokens))
+        yield tokens
+        count += 1
+    logger.debug("Finished segmenting {0} texts.".format(count))
+
+
 def get_key_words(s, max_words=50, weighted=False):
     """Determines key words in Chinese text *s*.
 
@@ -286,16 +964,32 @@ def get_key_words(s, max_words=50, weighted=False):
         (defaults to ``True``).
 
     """
+    cache = _cache
+    if cache is not None:
+        key = ("get_key_words", s, max_words, weighted)
+        cached = cache.get(key)
+        if cached is not None:
+            return list(cached)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    timer = None if _stats is None else _stats.timer("get_key_words")
     s = _decode(s)
-    logger.debug(
-        "Searching for up to {0}{1} key words in: {2}.".format(
-            max_words, " weighted" if weighted else "", s
+    if debug:
+        logger.debug(
+            "Searching for up to {0}{1} key words in: {2}.".format(
+                max_words, " weighted" if weighted else "", s
+            )
         )
-    )
-    result = nlpir.GetKeyWords(_encode(s), max_words, weighted)
+    encoded = _encode(s)
+    if timer is not None:
+        timer.phase("encode")
+    result = nlpir.GetKeyWords(encoded, max_words, weighted)
+    if timer is not None:
+        timer.phase("nlpir")
+        bytes_out = len(result)
     result = _decode(result)
-    logger.debug("Finished key word search: {0}.".format(result))
-    logger.debug("Formatting key word search results.")
+    if debug:
+        logger.debug("Finished key word search: {0}.".format(result))
+        logger.debug("Formatting key word search results.")
     fresult = result.strip("#").split("#") if result else []
     if weighted:
         weights, words = [], []
@@ -306,5 +1000,660 @@ def get_key_words(s, max_words=50, weighted=False):
             weights.append(weight or 0.0)
             words.append(word)
         fresult = list(zip(words, weights))
-    logger.debug("Key words formatted: {0}.".format(fresult))
+    if debug:
+        logger.debug("Key words formatted: {0}.".format(fresult))
+    if timer is not None:
+        timer.phase("format")
+        timer.record(len(encoded), bytes_out, len(fresult))
+    if cache is not None:
+        cache.put(key, tuple(fresult))
     return fresult
+
+
+def get_key_word_matrix(docs, max_words=50, vocabulary=None):
+    """Determines key words and their weights for each Chinese text in *docs*.
+
+    The key words are returned as a :data:`KeyWordMatrix`, a sparse matrix in
+    compressed sparse row format with one row per document and one column per
+    word in the vocabulary. The matrix is stored in :mod:`array` arrays
+    (``indptr`` and ``indices`` are 64-bit and 32-bit integers and
+    ``weights`` are 32-bit floats), which is much more compact than lists of
+    tuples. The arrays support the buffer protocol, so they can be used
+    without copying, e.g. ``numpy.frombuffer(matrix.weights, 'float32')`` or
+    ``scipy.sparse.csr_matrix((weights, indices, indptr))`` after converting
+    them to NumPy arrays.
+
+    Each document's weights are the same as what :func:`get_key_words` returns
+    when *weighted* is ``True``.
+
+    :param docs: An iterable of Chinese texts to analyze. Each text should be
+        Unicode or a UTF-8 encoded string.
+    :param int max_words: The maximum number of key words to find for each
+        text (defaults to ``50``).
+    :param dict vocabulary: A dictionary that maps words to column indices.
+        New words are added to it. Pass the same dictionary to several calls
+        to get matrices with the same columns. Defaults to a new dictionary.
+    :returns: A :data:`KeyWordMatrix` instance.
+
+    """
+    if vocabulary is None:
+        vocabulary = {}
+    encoding, errors = ENCODING, ENCODING_ERRORS
+    get_key_words = nlpir.GetKeyWords
+    indptr, indices, weights = array.array("q", [0]), array.array("i"), array.array("f")
+    for s in docs:
+        if isinstance(s, str):
+            s = s.encode(encoding, errors)
+        result = get_key_words(s, max_words, True)
+        result = result.decode(encoding, errors).strip("#") if result else ""
+        for w in result.split("#") if result else ():
+            fields = w.split("/")
+            word = fields[0]
+            try:
+                index = vocabulary[word]
+            except KeyError:
+                index = vocabulary[word] = len(vocabulary)
+            indices.append(index)
+            weights.append(_to_float(fields[2]) or 0.0)
+        indptr.append(len(indices))
+    logger.debug(
+        "Found {0} key words in {1} texts.".format(len(indices), len(indptr) - 1)
+    )
+    return KeyWordMatrix(vocabulary, indptr, indices, weights)
+
+
+def segment_spans(s, user_dict=True, max_chunk=None):
+    """Segment Chinese text *s* and return the location of each word.
+
+    The segmented words are returned as a list of :data:`Span` instances, e.g.
+    ``[Span(start=0, length=2, pos='rr', word_type=0, weight=...), ...]``.
+    The word itself is ``s[span.start:span.start + span.length]``.
+
+    Offsets index into *s* as it was given: if *s* is a string, they are
+    character offsets; if *s* is encoded, they are byte offsets and *s* is
+    passed to NLPIR without being decoded. Leading and trailing whitespace is
+    not segmented, but offsets still account for it.
+
+    Unlike :func:`segment`, this reads NLPIR's result vector directly instead
+    of building and parsing an intermediate string. Part of speech codes are
+    not converted to names; see :func:`pynlpir.pos_map.get_pos_name`.
+
+    This uses the function :func:`~pynlpir.nlpir.ParagraphProcessA` to segment
+    *s*.
+
+    :param s: The Chinese text to segment. *s* should be Unicode or a UTF-8
+        encoded string.
+    :param bool user_dict: Whether or not to use the user dictionary (defaults
+        to ``True``).
+    :param int max_chunk: If given, *s* is split into pieces of at most this
+        length by :func:`split_text` and each piece is segmented separately.
+        The offsets still index into *s*.
+
+    """
+    if max_chunk is not None:
+        return [
+            span._replace(start=start + span.start)
+            for start, piece in split_text(s, max_chunk)
+            if piece.strip()
+            for span in segment_spans(piece, user_dict)
+        ]
+    return [
+        Span(start, length, _decode(r.sPOS) or None, r.word_type, r.weight)
+        for start, length, r in _iter_spans(s, user_dict, "segment_spans")
+    ]
+
+
+def _iter_spans(s, user_dict, operation):
+    """Segments *s* and yields the ``(start, length, result)`` of each word.
+
+    *start* and *length* are offsets into *s* (see :func:`segment_spans`) and
+    *result* is the word's :class:`~pynlpir.nlpir.ResultT`. It points into a
+    :class:`~pynlpir.nlpir.ResultBuffer` that is reused by later calls, so it
+    must be read before the next word is requested. If profiling statistics
+    are enabled, the call is recorded as *operation* once every word has been
+    yielded.
+
+    """
+    global _result_buffer
+    timer = None if _stats is None else _stats.timer(operation)
+    stripped, offset = _strip(s)
+    encoded = _encode(stripped)
+    buffer, _result_buffer = _result_buffer, None
+    if buffer is None:
+        buffer = nlpir.ResultBuffer()
+    try:
+        if timer is not None:
+            timer.phase("encode")
+        count = buffer.process(encoded, user_dict)
+        if timer is not None:
+            timer.phase("nlpir")
+        results = buffer.results
+        is_str = isinstance(s, str)
+        # NLPIR's offsets are byte offsets. For strings, convert them to
+        # character offsets by decoding the bytes between and within each word
+        # only once.
+        byte_pos, char_pos = 0, offset
+        for i in range(count):
+            r = results[i]
+            if is_str:
+                word_start, word_end = r.start, r.start + r.length
+                start = char_pos + len(_decode(encoded[byte_pos:word_start]))
+                length = len(_decode(encoded[word_start:word_end]))
+                byte_pos, char_pos = word_end, start + length
+            else:
+                start, length = r.start + offset, r.length
+            yield start, length, r
+    finally:
+        if len(buffer.results) <= _MAX_RESULT_BUFFER:
+            _result_buffer = buffer
+        else:
+            buffer.close()
+    if timer is not None:
+        timer.phase("format")
+        result_size = count * ctypes.sizeof(nlpir.ResultT)
+        timer.record(len(encoded), result_size, count)
+
+
+def segment_tokens(
+    s,
+    pos_names="parent",
+    pos_english=True,
+    pos_tags=pos_map.POS_MAP,
+    user_dict=True,
+):
+    """Segment Chinese text *s* and return the words as a :class:`Tokens`.
+
+    The result can be indexed and iterated over like the list returned by
+    :func:`segment` with *pos_tagging* set to ``True``, e.g.
+    ``tokens[0] == ('我们', 'pronoun')``, but it stores the words' offsets and
+    part of speech IDs in arrays instead of creating a tuple of two strings
+    for each word. Use it to keep many segmented texts in memory at once.
+
+    The words are the same as the words located by :func:`segment_spans`.
+
+    :param s: The Chinese text to segment. *s* should be Unicode or a UTF-8
+        encoded string. If it's encoded, words are decoded when they are
+        accessed.
+    :param bool user_dict: Whether or not to use the user dictionary (defaults
+        to ``True``).
+
+    See :func:`segment` for a description of the other arguments.
+
+    """
+    # Starts are 64-bit, so byte offsets into texts over 2 GiB don't overflow.
+    starts, lengths, pos_ids = array.array("Q"), array.array("i"), array.array("H")
+    get_pos_id = pos_map.get_pos_id
+    for start, length, r in _iter_spans(s, user_dict, "segment_tokens"):
+        starts.append(start)
+        lengths.append(length)
+        pos_ids.append(get_pos_id(r.sPOS))
+    return Tokens(s, starts, lengths, pos_ids, pos_names, pos_english, pos_tags)
+
+
+def _read_chunks(f, paragraphs=False):
+    """Reads lines or paragraphs from the file object *f*."""
+    if not paragraphs:
+        yield from f
+        return
+    lines = []
+    for line in f:
+        lines.append(line)
+        if not line.strip():
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def segment_file(
+    path,
+    pos_tagging=True,
+    pos_names="parent",
+    pos_english=True,
+    pos_tags=pos_map.POS_MAP,
+    paragraphs=False,
+    encoding=None,
+):
+    """Segment the Chinese text in the file *path* using NLPIR.
+
+    This is a generator that reads the file one line (or paragraph) at a time,
+    so memory use doesn't depend on the file's size. It yields a tuple
+    ``(start, token)`` for each segmented word, where *start* is the word's
+    character offset from the beginning of the file and *token* is formatted
+    the same way as the items returned by :func:`segment`, e.g.
+    ``(0, ('我们', 'pronoun'))``.
+
+    This uses the function :func:`~pynlpir.nlpir.ParagraphProcessA` to segment
+    each line or paragraph.
+
+    :param str path: The file to segment.
+    :param bool paragraphs: Whether to segment the file one paragraph at a
+        time instead of one line at a time (defaults to ``False``). Paragraphs
+        are separated by blank lines.
+    :param str encoding: The file's encoding (defaults to :data:`ENCODING`).
+
+    See :func:`segment` for a description of the other arguments.
+
+    """
+    if encoding is None:
+        encoding = ENCODING
+    logger.debug("Segmenting file: '{0}'.".format(path))
+    offset = 0
+    with fopen(path, encoding=encoding, errors=ENCODING_ERRORS, newline="") as f:
+        for chunk in _read_chunks(f, paragraphs):
+            spans = segment_spans(chunk) if not chunk.isspace() else []
+            if not pos_tagging:
+                for span in spans:
+                    start, end = span.start, span.start + span.length
+                    yield (offset + start, chunk[start:end])
+                offset += len(chunk)
+                continue
+            names = [span.pos for span in spans]
+            if pos_names is not None:
+                names = _get_pos_names(names, pos_names, pos_english, pos_tags=pos_tags)
+            for span, pos in zip(spans, names):
+                start, end = span.start, span.start + span.length
+                yield (offset + start, (chunk[start:end], pos))
+            offset += len(chunk)
+    logger.debug("Finished segmenting file: '{0}'.".format(path))
+
+
+def _encode_path(path):
+    """Encodes the file system path *path* for NLPIR."""
+    path = os.fspath(path)
+    if isinstance(path, bytes):
+        return path
+    # NLPIR opens files with the C library, which uses the ANSI code page on
+    # Windows rather than UTF-8.
+    return path.encode("mbcs") if sys.platform.startswith("win") else os.fsencode(path)
+
+
+def _count_tokens(path):
+    """Counts the whitespace separated tokens in the file *path*."""
+    with fopen(path, "rb") as f:
+        return sum(len(line.split()) for line in f)
+
+
+def process_file(source, result, pos_tagging=True, count_tokens=False):
+    """Segment the Chinese text in the file *source* and save it to *result*.
+
+    NLPIR reads and writes the files itself, so the text never has to be
+    decoded or encoded by Python. The file *source* must be encoded using
+    :data:`ENCODING`. The segmented words in *result* are separated by spaces.
+
+    This uses the function :func:`~pynlpir.nlpir.FileProcess`.
+
+    :param str source: The file to segment.
+    :param str result: The file to write the segmented text to.
+    :param bool pos_tagging: Whether or not to include part of speech tags in
+        *result* (defaults to ``True``).
+    :param bool count_tokens: Whether or not to count the segmented words in
+        *result* once it is written (defaults to ``False``). This reads the
+        whole result file again in Python.
+    :returns: A :class:`FileStats` instance.
+    :raises RuntimeError: NLPIR failed to process the file.
+
+    """
+    logger.debug("Processing file '{0}' to '{1}'.".format(source, result))
+    timer = None if _stats is None else _stats.timer("process_file")
+    # NLPIR returns its processing speed (in unspecified units), so time the
+    # call instead.
+    start = time.perf_counter()
+    if not nlpir.FileProcess(_encode_path(source), _encode_path(result), pos_tagging):
+        raise RuntimeError("NLPIR function 'NLPIR_FileProcess' failed.")
+    seconds = time.perf_counter() - start
+    if timer is not None:
+        timer.phase("nlpir")
+    tokens = _count_tokens(result) if count_tokens else None
+    if timer is not None:
+        timer.phase("count_tokens")
+        bytes_in, bytes_out = os.path.getsize(source), os.path.getsize(result)
+        timer.record(bytes_in, bytes_out, tokens or 0)
+    stats = FileStats(source, result, os.path.getsize(source), tokens, seconds)
+    logger.debug("Finished processing file: {0}.".format(stats))
+    return stats
+
+
+def process_directory(source_dir, result_dir, pos_tagging=True, count_tokens=False):
+    """Segment every file in *source_dir* and save the results to *result_dir*.
+
+    Each file in *source_dir* (subdirectories are skipped) is processed with
+    :func:`process_file` and its result is saved in *result_dir* using the
+    same file name. *result_dir* is created if it doesn't exist.
+
+    :param str source_dir: The directory containing the files to segment.
+    :param str result_dir: The directory to write the segmented files to.
+
+    See :func:`process_file` for a description of the other arguments.
+
+    :returns: A list of :class:`FileStats` instances, one for each file.
+
+    """
+    os.makedirs(result_dir, exist_ok=True)
+    stats = []
+    for name in sorted(os.listdir(source_dir)):
+        source = os.path.join(source_dir, name)
+        if os.path.isfile(source):
+            result = os.path.join(result_dir, name)
+            stats.append(process_file(source, result, pos_tagging, count_tokens))
+    return stats
+
+
+class NewWordDiscovery:
+    """Finds new words in Chinese text using NLPIR's new word identification.
+
+    Text is added with :meth:`add_texts` or :meth:`add_file` and the new words
+    are returned by :meth:`get_results`. A discovery can be used as a context
+    manager::
+
+        with NewWordDiscovery() as discovery:
+            discovery.add_texts(texts)
+            discovery.add_file('crawl.txt')
+            new_words = discovery.get_results()
+            discovery.add_to_user_dict()
+
+    Texts are buffered and sent to NLPIR in batches of about *batch_size*
+    characters, so NLPIR is called once per batch instead of once per text and
+    memory use is bounded by *batch_size*. Files are read by NLPIR itself.
+
+    When used as a context manager, new word identification is completed on
+    exit unless an exception was raised.
+
+    Only one discovery can run at a time because NLPIR keeps its state
+    globally.
+
+    This uses the functions :func:`~pynlpir.nlpir.NWI_Start`,
+    :func:`~pynlpir.nlpir.NWI_AddMem`, :func:`~pynlpir.nlpir.NWI_AddFile`,
+    :func:`~pynlpir.nlpir.NWI_Complete`, :func:`~pynlpir.nlpir.NWI_GetResult`,
+    and :func:`~pynlpir.nlpir.NWI_Result2UserDict`.
+
+    :param int batch_size: The approximate number of characters to send to
+        NLPIR at a time (defaults to ``1048576``).
+
+    """
+
+    def __init__(self, batch_size=1048576):
+        self.batch_size = batch_size
+        self._batch = []
+        self._batch_length = 0
+        self._started = False
+        self._completed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Don't identify new words in a partial text if an error occurred.
+        if exc_type is None and self._started and not self._completed:
+            self.complete()
+
+    def start(self):
+        """Starts new word identification.
+
+        :raises RuntimeError: NLPIR failed to start new word identification.
+
+        """
+        logger.debug("Starting new word identification.")
+        if not nlpir.NWI_Start():
+            raise RuntimeError("NLPIR function 'NLPIR_NWI_Start' failed.")
+        self._started = True
+        self._completed = False
+
+    def _check_started(self):
+        """Raises an error unless text can be added."""
+        if not self._started:
+            raise RuntimeError("New word identification hasn't been started.")
+        if self._completed:
+            raise RuntimeError("New word identification has been completed.")
+
+    def _flush(self):
+        """Sends the buffered texts to NLPIR."""
+        if not self._batch:
+            return
+        logger.debug(
+            "Adding {0} texts to new word identification.".format(len(self._batch))
+        )
+        text = _encode("\n".join(self._batch))
+        self._batch = []
+        self._batch_length = 0
+        if not nlpir.NWI_AddMem(text):
+            raise RuntimeError("NLPIR function 'NLPIR_NWI_AddMem' failed.")
+
+    def add_texts(self, docs):
+        """Adds each Chinese text in *docs* to new word identification.
+
+        :param docs: An iterable of Chinese texts (or a single text). Each
+            text should be Unicode or a UTF-8 encoded string.
+
+        """
+        self._check_started()
+        if isinstance(docs, (str, bytes)):
+            docs = (docs,)
+        for s in docs:
+            s = _decode(s)
+            self._batch.append(s)
+            self._batch_length += len(s)
+            if self._batch_length >= self.batch_size:
+                self._flush()
+
+    def add_file(self, path):
+        """Adds the Chinese text in the file *path* to new word identification.
+
+        The file must be encoded using :data:`ENCODING`.
+
+        """
+        self._check_started()
+        self._flush()
+        logger.debug("Adding file '{0}' to new word identification.".format(path))
+        if not nlpir.NWI_AddFile(_encode_path(path)):
+            raise RuntimeError("NLPIR function 'NLPIR_NWI_AddFile' failed.")
+
+    def complete(self):
+        """Finishes adding text and identifies the new words."""
+        self._check_started()
+        self._flush()
+        logger.debug("Completing new word identification.")
+        if not nlpir.NWI_Complete():
+            raise RuntimeError("NLPIR function 'NLPIR_NWI_Complete' failed.")
+        self._completed = True
+
+    def get_results(self):
+        """Gets the new words, completing new word identification if needed.
+
+        :returns: A list of :data:`NewWord` instances, e.g.
+            ``[NewWord(word='亚伯拉罕', pos='n_new', weight=...), ...]``.
+
+        """
+        if not self._completed:
+            self.complete()
+        result = _decode(nlpir.NWI_GetResult(True) or b"").strip("#")
+        new_words = []
+        for w in result.split("#") if result else ():
+            fields = w.split("/")
+            pos = fields[1] if len(fields) > 1 else None
+            weight = _to_float(fields[2]) if len(fields) > 2 else False
+            new_words.append(NewWord(fields[0], pos, weight or 0.0))
+        logger.debug("Found {0} new words.".format(len(new_words)))
+        return new_words
+
+    def add_to_user_dict(self, save=False):
+        """Adds the new words to the user dictionary.
+
+        This completes new word identification if needed and clears the result
+        cache.
+
+        :param bool save: Whether or not to save the user dictionary to disk
+            afterwards (defaults to ``False``).
+
+        """
+        if not self._completed:
+            self.complete()
+        clear_cache()
+        if not nlpir.NWI_Result2UserDict():
+            raise RuntimeError("NLPIR function 'NLPIR_NWI_Result2UserDict' failed.")
+        if save and not nlpir.SaveTheUsrDic():
+            raise RuntimeError("NLPIR function 'NLPIR_SaveTheUsrDic' failed.")
+
+
+def fingerprint(s):
+    """Computes a fingerprint of the Chinese text *s*.
+
+    Texts with the same content have the same fingerprint, so fingerprints can
+    be used to find duplicate texts without comparing or hashing the whole
+    texts. See :class:`FingerprintIndex`.
+
+    This uses the function :func:`~pynlpir.nlpir.FingerPrint`.
+
+    :param s: The Chinese text to fingerprint. *s* should be Unicode or a
+        UTF-8 encoded string.
+    :returns: The fingerprint, an unsigned integer. ``0`` if NLPIR failed to
+        compute a fingerprint.
+    :rtype: int
+
+    """
+    return nlpir.FingerPrint(_encode(s))
+
+
+class FingerprintIndex:
+    """An in-memory index of text fingerprints for finding duplicate texts.
+
+    Each text is added with a key (e.g. a document ID) and its fingerprint is
+    computed by :func:`fingerprint`. :meth:`find` returns the keys of the
+    indexed texts that are duplicates of a text, which makes it easy to skip
+    duplicates in a feed::
+
+        index = FingerprintIndex()
+        for article_id, text in articles:
+            if index.add(article_id, text):
+                continue  # Already seen.
+            ...
+
+    If *max_distance* is greater than ``0``, texts whose fingerprints differ
+    in at most *max_distance* bits are also considered duplicates. Lookups
+    stay fast because each fingerprint is split into ``max_distance + 1``
+    bands that are indexed separately: two fingerprints that differ in at most
+    *max_distance* bits must have at least one identical band, so only texts
+    sharing a band are compared. Whether a small difference between
+    fingerprints means a small difference between texts depends on NLPIR's
+    fingerprint algorithm.
+
+    :param int max_distance: The maximum number of bits in which the
+        fingerprints of duplicate texts can differ (defaults to ``0``).
+
+    """
+
+    #: The number of bits in a fingerprint.
+    bits = ctypes.sizeof(ctypes.c_ulong) * 8
+
+    def __init__(self, max_distance=0):
+        if not 0 <= max_distance < self.bits:
+            raise ValueError(
+                "max_distance must be between 0 and {0}.".format(self.bits - 1)
+            )
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        self._bands = [
+            (i * self.bits // bands, (1 << ((i + 1) * self.bits // bands)) - 1)
+            for i in range(bands)
+        ]
+        self._buckets = [{} for _ in self._bands]
+        # Maps each key to the number of texts added before it (so duplicates
+        # can be returned in the order they were added) and its fingerprint.
+        self._fingerprints = {}
+        self._count = 0
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def __contains__(self, key):
+        return key in self._fingerprints
+
+    def _band_values(self, fp):
+        """Gets the value of each of *fp*'s bands."""
+        return [(fp & mask) >> shift for shift, mask in self._bands]
+
+    def add_fingerprint(self, key, fp):
+        """Adds the fingerprint *fp* with the key *key* to the index.
+
+        :returns: A list of the keys of texts that were already indexed and
+            are duplicates of this text.
+
+        """
+        if key in self._fingerprints:
+            self.remove(key)
+        duplicates = self.find_fingerprint(fp)
+        self._fingerprints[key] = (self._count, fp)
+        self._count += 1
+        for buckets, value in zip(self._buckets, self._band_values(fp)):
+            buckets.setdefault(value, []).append(key)
+        return duplicates
+
+    def add(self, key, s):
+        """Adds the Chinese text *s* with the key *key* to the index.
+
+        :returns: A list of the keys of texts that were already indexed and
+            are duplicates of *s*.
+
+        """
+        return self.add_fingerprint(key, fingerprint(s))
+
+    def remove(self, key):
+        """Removes the text with the key *key* from the index.
+
+        :raises KeyError: *key* isn't in the index.
+
+        """
+        _, fp = self._fingerprints.pop(key)
+        for buckets, value in zip(self._buckets, self._band_values(fp)):
+            bucket = buckets[value]
+            bucket.remove(key)
+            if not bucket:
+                del buckets[value]
+
+    def find_fingerprint(self, fp):
+        """Gets the keys of indexed texts that have fingerprints close to *fp*.
+
+        :returns: A list of keys in the order they were added.
+
+        """
+        candidates = set()
+        for buckets, value in zip(self._buckets, self._band_values(fp)):
+            candidates.update(buckets.get(value, ()))
+        max_distance = self.max_distance
+        fingerprints = self._fingerprints
+        if max_distance:
+            candidates = [
+                key
+                for key in candidates
+                if bin(fingerprints[key][1] ^ fp).count("1") <= max_distance
+            ]
+        return sorted(candidates, key=lambda key: fingerprints[key][0])
+
+    def find(self, s):
+        """Gets the keys of indexed texts that are duplicates of the text *s*.
+
+        :returns: A list of keys in the order they were added.
+
+        """
+        return self.find_fingerprint(fingerprint(s))
+
+
+def fingerprint_index(docs, max_distance=0):
+    """Builds a :class:`FingerprintIndex` for each Chinese text in *docs*.
+
+    Each text's key is its position in *docs*.
+
+    :param docs: An iterable of Chinese texts to index.
+    :param int max_distance: See :class:`FingerprintIndex`.
+    :returns: A :class:`FingerprintIndex` instance.
+
+    """
+    index = FingerprintIndex(max_distance)
+    encoding, errors = ENCODING, ENCODING_ERRORS
+    finger_print = nlpir.FingerPrint
+    for i, s in enumerate(docs):
+        if isinstance(s, str):
+            s = s.encode(encoding, errors)
+        index.add_fingerprint(i, finger_print(s))
+    return index
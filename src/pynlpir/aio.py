@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Using NLPIR from :mod:`asyncio` code.
+
+Calling :func:`pynlpir.segment` from a coroutine blocks the event loop until
+NLPIR is done. The coroutines in this module run NLPIR on the worker thread of
+a :class:`~pynlpir.session.Session` instead, so the event loop keeps running::
+
+    async def main():
+        async with AsyncSession() as session:
+            tokens = await session.segment('我们都是美国人。')
+
+The results are the same as the results of the synchronous functions.
+
+"""
+import asyncio
+import logging
+
+import pynlpir
+from pynlpir.session import Session
+
+logger = logging.getLogger("pynlpir.aio")
+
+#: The default maximum number of calls that can wait for NLPIR at once.
+MAX_PENDING = 64
+
+
+class AsyncSession:
+    """An NLPIR session for :mod:`asyncio` code.
+
+    :param session: The :class:`~pynlpir.session.Session` to run calls on
+        (defaults to a new :class:`~pynlpir.session.Session`). It's opened by
+        :meth:`open` and closed by :meth:`close`.
+    :param int max_pending: The maximum number of calls that can be queued
+        for the session's worker thread at once (defaults to
+        :data:`MAX_PENDING`). Further calls wait until there is room, so a
+        burst of requests doesn't build an unbounded queue of texts.
+
+    An async session can be used as an async context manager::
+
+        async with AsyncSession() as session:
+            ...
+
+    A call that is cancelled before NLPIR starts working on it is removed from
+    the queue. NLPIR can't be interrupted, so a call that is cancelled while
+    NLPIR is working on it finishes in the background and its result is
+    discarded.
+
+    """
+
+    def __init__(self, session=None, max_pending=MAX_PENDING):
+        self.session = Session() if session is None else session
+        self.max_pending = max_pending
+        # The semaphore is created by the first call so that it belongs to the
+        # running event loop.
+        self._semaphore = None
+
+    # Named like pynlpir.open() on purpose.
+    async def open(self):  # noqa: A003
+        """Opens the session without blocking the event loop.
+
+        :raises RuntimeError: Another session is already open or NLPIR failed
+            to initialize.
+
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.session.open)
+
+    async def close(self):
+        """Waits for pending calls to finish and closes the session."""
+        await asyncio.get_running_loop().run_in_executor(None, self.session.close)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def run(self, func, *args, **kwargs):
+        """Calls ``func(*args, **kwargs)`` on the session's worker thread.
+
+        This waits for room in the queue if :attr:`max_pending` calls are
+        already waiting.
+
+        :returns: The call's result.
+        :raises RuntimeError: The session isn't open.
+
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        async with self._semaphore:
+            future = self.session.submit(func, *args, **kwargs)
+            # Cancelling the wrapped future also cancels *future* if it hasn't
+            # started running yet.
+            return await asyncio.wrap_future(future)
+
+    async def segment(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment` on the session's worker thread."""
+        return await self.run(pynlpir.segment, s, *args, **kwargs)
+
+    async def segment_spans(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment_spans` on the session's worker thread."""
+        return await self.run(pynlpir.segment_spans, s, *args, **kwargs)
+
+    async def get_key_words(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.get_key_words` on the session's worker thread."""
+        return await self.run(pynlpir.get_key_words, s, *args, **kwargs)
+
+
+# The session used by the module-level functions. See open().
+_session = None
+
+
+# Named like pynlpir.open() on purpose.
+async def open(*args, **kwargs):  # noqa: A001
+    """Opens the NLPIR API for the module-level functions.
+
+    The arguments are the same as the arguments for :func:`pynlpir.open`,
+    plus *max_pending* (see :class:`AsyncSession`).
+
+    """
+    global _session
+    max_pending = kwargs.pop("max_pending", MAX_PENDING)
+    session = AsyncSession(Session(*args, **kwargs), max_pending)
+    await session.open()
+    _session = session
+    logger.debug("Opened the NLPIR API for asyncio.")
+
+
+async def close():
+    """Closes the NLPIR API opened by :func:`open`."""
+    global _session
+    if _session is not None:
+        session, _session = _session, None
+        await session.close()
+    logger.debug("Closed the NLPIR API for asyncio.")
+
+
+def _get_session():
+    """Gets the session opened by :func:`open`."""
+    if _session is None:
+        raise RuntimeError("The NLPIR API is not open; call pynlpir.aio.open().")
+    return _session
+
+
+async def segment(s, *args, **kwargs):
+    """Like :func:`pynlpir.segment`, but doesn't block the event loop.
+
+    :raises RuntimeError: :func:`open` hasn't been called.
+
+    """
+    return await _get_session().segment(s, *args, **kwargs)
+
+
+async def get_key_words(s, *args, **kwargs):
+    """Like :func:`pynlpir.get_key_words`, but doesn't block the event loop.
+
+    :raises RuntimeError: :func:`open` hasn't been called.
+
+    """
+    return await _get_session().get_key_words(s, *args, **kwargs)
@@ -1,9 +1,12 @@
 """The command-line interface to PyNLPIR."""
 
 import hashlib
+import itertools
+import json
 import os
 import shutil
 import tempfile
+import time
 from urllib.error import URLError
 from urllib.request import urlretrieve
 
@@ -18,6 +21,8 @@ LICENSE_URL = (
 )
 DATA_DIR = os.path.join(pynlpir.nlpir.PACKAGE_DIR, "Data")
 LICENSE_FILENAME = "NLPIR.user"
+# The default number of lines sent to a process and written at a time.
+BATCH_SIZE = 64
 
 
 @click.group(
@@ -93,5 +98,340 @@ def update(data_dir):
         click.echo("Your license is already up-to-date.")
 
 
+def _read_lines(files, encoding):
+    """Yields the lines of each file in *files* without their line endings.
+
+    ``-`` (the default) is standard input.
+
+    """
+    for path in files or ("-",):
+        if path == "-":
+            f = click.get_text_stream("stdin", encoding=encoding)
+            for line in f:
+                yield line.rstrip("\r\n")
+            continue
+        with open(path, encoding=encoding) as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+
+def _process(func_name, docs, jobs, batch_size, data_dir, kwargs):
+    """Calls the NLPIR function *func_name* on each text in *docs*.
+
+    If *jobs* is ``1``, NLPIR is used in this process. Otherwise, a
+    :class:`pynlpir.parallel.Pool` with *jobs* worker processes is used (all
+    CPUs if *jobs* is ``0``). Yields the results in order.
+
+    """
+    # The data directory given on the command line is NLPIR's Data directory,
+    # but pynlpir.open() wants the directory that contains it.
+    data_dir = os.path.dirname(os.path.abspath(data_dir))
+    if jobs == 1:
+        pynlpir.open(data_dir)
+        try:
+            if func_name == "segment":
+                yield from pynlpir.segment_many(docs, **kwargs)
+            else:
+                func = getattr(pynlpir, func_name)
+                for s in docs:
+                    yield func(s, **kwargs)
+        finally:
+            pynlpir.close()
+        return
+    # Starting worker processes is only needed with --jobs, so only import the
+    # pool when it's needed.
+    from pynlpir import parallel
+
+    with parallel.Pool(jobs or None, data_dir, chunk_size=batch_size) as pool:
+        if func_name == "segment_spans":
+            # Pool.segment_spans() splits a single long text instead.
+            yield from pool.segment_spans_many(docs, **kwargs)
+        else:
+            yield from getattr(pool, func_name)(docs, **kwargs)
+
+
+def _format_segmented(tokens, output_format, pos_tagging):
+    """Formats the tokens of a text as a string for output."""
+    if pos_tagging:
+        words = [word for word, pos in tokens]
+        pos_names = [pos for word, pos in tokens]
+    else:
+        words, pos_names = tokens, [None] * len(tokens)
+    if output_format == "text":
+        text = " ".join(
+            word if pos is None else "{0}/{1}".format(word, pos)
+            for word, pos in zip(words, pos_names)
+        )
+        return text + "\n"
+    if not pos_tagging:
+        return "".join(word + "\n" for word in words) + "\n"
+    text = "".join(
+        "{0}\t{1}\n".format(word, "" if pos is None else pos)
+        for word, pos in zip(words, pos_names)
+    )
+    return text + "\n"
+
+
+def _format_spans(line, spans, pos_tagging, pos_names, pos_english):
+    """Formats the words located in the text *line* as a JSON record.
+
+    *spans* are the words' :data:`pynlpir.Span` instances, so each word is
+    taken from *line* at its offset.
+
+    """
+    bounds = [(span.start, span.start + span.length) for span in spans]
+    record = {
+        "words": [line[start:end] for start, end in bounds],
+        "offsets": [span.start for span in spans],
+    }
+    if pos_tagging:
+        codes = [span.pos for span in spans]
+        if pos_names is not None:
+            codes = pynlpir._get_pos_names(codes, pos_names, pos_english)
+        record["pos"] = codes
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _format_key_words(line, key_words, output_format, weighted):
+    """Formats the key words of the text *line* as a string for output."""
+    if weighted:
+        words = [word for word, weight in key_words]
+        weights = [weight for word, weight in key_words]
+    else:
+        words, weights = key_words, [None] * len(key_words)
+    if output_format == "text":
+        text = " ".join(
+            word if weight is None else "{0}/{1}".format(word, weight)
+            for word, weight in zip(words, weights)
+        )
+        return text + "\n"
+    if output_format == "tsv":
+        if not weighted:
+            return "".join(word + "\n" for word in words) + "\n"
+        text = "".join(
+            "{0}\t{1}\n".format(word, weight) for word, weight in zip(words, weights)
+        )
+        return text + "\n"
+    record = {"key_words": words}
+    if weighted:
+        record["weights"] = weights
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _run(func_name, files, options, kwargs, format_result, count_items):
+    """Runs a command that calls *func_name* on each line of *files*.
+
+    Writes each result formatted by *format_result* to standard output, in
+    batches. If requested, prints throughput statistics to standard error,
+    counting the items in each result with *count_items*.
+
+    """
+    encoding = options["encoding"]
+    lines, docs = itertools.tee(_read_lines(files, encoding))
+    results = _process(
+        func_name,
+        docs,
+        options["jobs"],
+        options["batch_size"],
+        options["data_dir"],
+        kwargs,
+    )
+    out = click.get_text_stream("stdout", encoding=encoding)
+    batch, texts, chars, items = [], 0, 0, 0
+    start = time.perf_counter()
+    try:
+        for line, result in zip(lines, results):
+            # NLPIR returns a single space for blank lines.
+            if not line.strip():
+                result = []
+            batch.append(format_result(line, result))
+            texts += 1
+            chars += len(line)
+            items += count_items(result)
+            if len(batch) >= options["batch_size"]:
+                out.write("".join(batch))
+                batch = []
+        out.write("".join(batch))
+        out.flush()
+    except (RuntimeError, pynlpir.LicenseError) as e:
+        click.secho("Error: {0}".format(e), fg="red", err=True)
+        exit(1)
+    if options["stats"]:
+        seconds = max(time.perf_counter() - start, 1e-9)
+        click.echo(
+            "Processed {0:,} texts ({1:,} characters, {2:,} {3}) in {4:.3f} s: "
+            "{5:,.0f} texts/s, {6:,.0f} characters/s, {7:,.0f} {3}/s.".format(
+                texts,
+                chars,
+                items,
+                "key words" if func_name == "get_key_words" else "tokens",
+                seconds,
+                texts / seconds,
+                chars / seconds,
+                items / seconds,
+            ),
+            err=True,
+        )
+
+
+def _processing_options(func):
+    """Adds the options shared by the text processing commands to *func*."""
+    options = (
+        click.argument(
+            "files",
+            nargs=-1,
+            type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+        ),
+        click.option(
+            "-f",
+            "--format",
+            "output_format",
+            help="The output format (defaults to text).",
+            type=click.Choice(["text", "tsv", "jsonl"]),
+            default="text",
+        ),
+        click.option(
+            "-j",
+            "--jobs",
+            help="The number of processes to use (0 uses every CPU).",
+            type=click.IntRange(min=0),
+            default=1,
+        ),
+        click.option(
+            "-b",
+            "--batch-size",
+            help="The number of lines sent to a process and written at a time.",
+            type=click.IntRange(min=1),
+            default=BATCH_SIZE,
+        ),
+        click.option(
+            "-e",
+            "--encoding",
+            help="The encoding of the input and output.",
+            default="utf_8",
+        ),
+        click.option(
+            "-s",
+            "--stats",
+            help="Print throughput statistics to standard error.",
+            is_flag=True,
+        ),
+        click.option(
+            "-d",
+            "--data-dir",
+            help="The NLPIR data directory to use.",
+            type=click.Path(exists=True, file_okay=False),
+            default=DATA_DIR,
+        ),
+    )
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+@cli.command(options_metavar="<options>")
+@_processing_options
+@click.option(
+    "--pos/--no-pos",
+    "pos_tagging",
+    help="Whether or not to include parts of speech (defaults to --pos).",
+    default=True,
+)
+@click.option(
+    "-n",
+    "--pos-names",
+    help="The type of part of speech names to use (defaults to parent).",
+    type=click.Choice(["parent", "child", "all", "raw", "code"]),
+    default="parent",
+)
+@click.option(
+    "--english/--chinese",
+    "pos_english",
+    help="The language of part of speech names (defaults to --english).",
+    default=True,
+)
+def segment(files, pos_tagging, pos_names, pos_english, **options):
+    """Segment Chinese text.
+
+    Each line of FILES (or standard input) is segmented and written to
+    standard output.
+    """
+    pos_names = None if pos_names == "code" else pos_names
+    if options["output_format"] == "jsonl":
+        # The words are taken from each line at the offsets reported by NLPIR,
+        # so the offsets always match the words.
+        def format_spans(line, spans):
+            return _format_spans(line, spans, pos_tagging, pos_names, pos_english)
+
+        _run("segment_spans", files, options, {}, format_spans, len)
+        return
+    kwargs = dict(pos_tagging=pos_tagging, pos_names=pos_names, pos_english=pos_english)
+
+    def format_result(line, tokens):
+        return _format_segmented(tokens, options["output_format"], pos_tagging)
+
+    _run("segment", files, options, kwargs, format_result, len)
+
+
+@cli.command(options_metavar="<options>")
+@_processing_options
+@click.option(
+    "-m",
+    "--max-words",
+    help="The maximum number of key words per line (defaults to 50).",
+    type=click.IntRange(min=1),
+    default=50,
+)
+@click.option("-w", "--weighted", help="Include key word weights.", is_flag=True)
+def keywords(files, max_words, weighted, **options):
+    """Find key words in Chinese text.
+
+    The key words of each line of FILES (or standard input) are written to
+    standard output.
+    """
+    kwargs = dict(max_words=max_words, weighted=weighted)
+
+    def format_result(line, key_words):
+        return _format_key_words(line, key_words, options["output_format"], weighted)
+
+    _run("get_key_words", files, options, kwargs, format_result, len)
+
+
+@cli.command(options_metavar="<options>")
+@click.option(
+    "-s",
+    "--socket",
+    "path",
+    help="The path of the Unix domain socket to listen on.",
+    type=click.Path(dir_okay=False),
+    default=None,
+)
+@click.option(
+    "-d",
+    "--data-dir",
+    help="The NLPIR data directory to use.",
+    type=click.Path(exists=True, file_okay=False),
+    default=DATA_DIR,
+)
+def serve(path, data_dir):
+    """Keep NLPIR open and answer requests.
+
+    Programs can then use pynlpir.server.Client instead of initializing NLPIR
+    themselves.
+    """
+    # Unix domain sockets aren't available everywhere, so only import the
+    # server when it's needed.
+    from pynlpir import server
+
+    if path is None:
+        path = server.SOCKET_PATH
+    click.echo("Serving NLPIR requests on {0}. Press Ctrl+C to stop.".format(path))
+    try:
+        server.serve(path, data_dir=os.path.dirname(os.path.abspath(data_dir)))
+    except (RuntimeError, pynlpir.LicenseError) as e:
+        click.secho("Error: {0}".format(e), fg="red", err=True)
+        exit(1)
+
+
 if __name__ == "__main__":
     cli()
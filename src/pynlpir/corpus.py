@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""Segmenting large corpora into a compact, memory-mapped format.
+
+:func:`segment_corpus` memory-maps a UTF-8 encoded text file, segments it a
+piece at a time (see :func:`pynlpir.split_text`), and writes the location and
+part of speech of every word to a binary file. :class:`Corpus` memory-maps
+that file back, so the words of a segmented corpus can be read again without
+segmenting it or loading it into memory::
+
+    pynlpir.corpus.segment_corpus('corpus.txt', 'corpus.seg')
+    with pynlpir.corpus.Corpus('corpus.seg', 'corpus.txt') as corpus:
+        for word, pos in corpus:
+            ...
+
+The file starts with a header (see :data:`HEADER`): the magic bytes
+:data:`MAGIC`, the format :data:`VERSION`, the number of part of speech codes,
+the number of words, and the size of the source file in bytes. It is
+followed by three arrays with one item per word: the words' start offsets in
+the source file (unsigned 64-bit integers), their lengths (unsigned 32-bit
+integers), and their part of speech IDs (unsigned 16-bit integers). The file
+ends with the part of speech codes, separated by null bytes: ID ``i`` is the
+``i``-th code and ID ``0`` (an empty code) means the word has no part of
+speech. Offsets and lengths count bytes and every number is little-endian.
+
+"""
+import array
+import codecs
+import collections.abc
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import pynlpir
+from pynlpir import pos_map
+
+logger = logging.getLogger("pynlpir.corpus")
+
+#: The magic bytes that segmented corpus files start with.
+MAGIC = b"PYNLPIRC"
+
+#: The version of the segmented corpus file format.
+VERSION = 1
+
+#: The :mod:`struct` format of a segmented corpus file's header.
+HEADER = struct.Struct("<8sIIQQ")
+
+# The array type codes of the words' starts, lengths, and part of speech IDs.
+_START, _LENGTH, _POS_ID = "Q", "I", "H"
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _write_array(f, a):
+    """Writes the array *a* to the file *f* in little-endian byte order."""
+    if not _LITTLE_ENDIAN:
+        a.byteswap()
+    a.tofile(f)
+
+
+def _write_words(text, starts_file, lengths_file, pos_ids_file, max_chunk, user_dict):
+    """Segments *text* a piece at a time and writes its words' arrays.
+
+    :returns: The number of words.
+
+    """
+    get_pos_id = pos_map.get_pos_id
+    count = 0
+    for offset, piece in pynlpir.split_text(text, max_chunk):
+        if not piece.strip():
+            continue
+        starts = array.array(_START)
+        lengths = array.array(_LENGTH)
+        pos_ids = array.array(_POS_ID)
+        for start, length, r in pynlpir._iter_spans(piece, user_dict, "segment_corpus"):
+            starts.append(offset + start)
+            lengths.append(length)
+            pos_ids.append(get_pos_id(r.sPOS))
+        _write_array(starts_file, starts)
+        _write_array(lengths_file, lengths)
+        _write_array(pos_ids_file, pos_ids)
+        count += len(starts)
+    return count
+
+
+def segment_corpus(source, result, max_chunk=pynlpir.MAX_CHUNK, user_dict=True):
+    """Segments the text file *source* and writes the words to *result*.
+
+    *source* is memory-mapped and segmented a piece at a time, so it's never
+    read into a string. The words are written to *result* in the format
+    described above, which can be read with :class:`Corpus`.
+
+    :param str source: The UTF-8 encoded text file to segment.
+    :param str result: The file to write the segmented words to.
+    :param int max_chunk: The maximum number of bytes that are passed to NLPIR
+        at a time (defaults to :data:`pynlpir.MAX_CHUNK`).
+    :param bool user_dict: Whether or not to use the user dictionary (defaults
+        to ``True``).
+    :returns: The number of segmented words.
+    :raises ValueError: NLPIR wasn't opened with a UTF-8 encoding.
+
+    """
+    if codecs.lookup(pynlpir.ENCODING).name != "utf-8":
+        raise ValueError("segment_corpus() requires NLPIR's encoding to be UTF-8.")
+    logger.debug("Segmenting corpus '{0}' to '{1}'.".format(source, result))
+    with open(source, "rb") as src, open(result, "wb") as out:
+        size = os.fstat(src.fileno()).st_size
+        # The starts are written after the header as they're found. The
+        # lengths and part of speech IDs are written to temporary files and
+        # appended afterwards, so memory use doesn't depend on the corpus size.
+        out.write(HEADER.pack(MAGIC, VERSION, 0, 0, size))
+        lengths_file = tempfile.TemporaryFile()
+        pos_ids_file = tempfile.TemporaryFile()
+        with lengths_file, pos_ids_file:
+            if size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as text:
+                    count = _write_words(
+                        text, out, lengths_file, pos_ids_file, max_chunk, user_dict
+                    )
+            else:
+                # Empty files can't be memory-mapped.
+                count = 0
+            for f in (lengths_file, pos_ids_file):
+                f.seek(0)
+                shutil.copyfileobj(f, out)
+        codes = pos_map.POS_CODES[:]
+        out.write(b"\0".join((code or "").encode("ascii") for code in codes))
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, len(codes), count, size))
+    logger.debug("Segmented {0} words in corpus '{1}'.".format(count, source))
+    return count
+
+
+class Corpus(collections.abc.Sequence):
+    """A segmented corpus file written by :func:`segment_corpus`.
+
+    The file is memory-mapped and its arrays are exposed as :class:`memoryview`
+    instances without being copied. Indexing and iterating return
+    ``(word, pos)`` tuples, where *pos* is the word's part of speech code.
+
+    :param str path: The segmented corpus file.
+    :param str source: The source text file that was segmented. It is only
+        needed to read the words themselves.
+    :raises ValueError: The file isn't a segmented corpus file or *source*
+        isn't the file that was segmented.
+
+    :ivar starts: The start offset of each word in the source file.
+    :ivar lengths: The length of each word in bytes.
+    :ivar pos_ids: The part of speech ID of each word. The code for an ID is
+        ``pos_codes[pos_id]``.
+    :ivar pos_codes: A list of the part of speech codes in the file.
+
+    A corpus can be used as a context manager; it's closed on exit.
+
+    """
+
+    def __init__(self, path, source=None):
+        self.path = path
+        self.source = source
+        self._mmaps = []
+        with open(path, "rb") as f:
+            self._data = self._map(f)
+        opened = False
+        try:
+            self._read()
+            if source is None:
+                self._text = None
+            else:
+                with open(source, "rb") as f:
+                    self._text = self._map(f) if self.source_size else b""
+                if len(self._text) != self.source_size:
+                    raise ValueError(
+                        "'{0}' is not the source of '{1}'.".format(source, path)
+                    )
+            opened = True
+        finally:
+            if not opened:
+                self.close()
+
+    def _map(self, f):
+        """Memory-maps the file object *f*."""
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmaps.append(m)
+        return m
+
+    def _read(self):
+        """Reads the header and creates views of the file's arrays."""
+        data = self._data
+        if len(data) < HEADER.size:
+            raise ValueError("'{0}' is not a segmented corpus.".format(self.path))
+        magic, version, code_count, count, self.source_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("'{0}' is not a segmented corpus.".format(self.path))
+        if version != VERSION:
+            raise ValueError(
+                "'{0}' has unsupported format version {1}.".format(self.path, version)
+            )
+        view = memoryview(data)
+        self._views = [view]
+        arrays, offset = [], HEADER.size
+        for typecode in (_START, _LENGTH, _POS_ID):
+            end = offset + count * array.array(typecode).itemsize
+            a = view[offset:end].cast(typecode)
+            self._views.append(a)
+            if not _LITTLE_ENDIAN:
+                a = array.array(typecode, a)
+                a.byteswap()
+            arrays.append(a)
+            offset = end
+        self.starts, self.lengths, self.pos_ids = arrays
+        codes = bytes(view[offset:]).decode("ascii").split("\0")
+        if len(codes) != code_count:
+            raise ValueError("'{0}' is truncated.".format(self.path))
+        self.pos_codes = [code or None for code in codes]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def word(self, i):
+        """Gets the word at index *i*.
+
+        :raises ValueError: The corpus was opened without its source file.
+
+        """
+        if self._text is None:
+            raise ValueError("The corpus was opened without its source file.")
+        start = self.starts[i]
+        end = start + self.lengths[i]
+        return self._text[start:end].decode("utf_8")
+
+    def pos_code(self, i):
+        """Gets the part of speech code of the word at index *i*."""
+        return self.pos_codes[self.pos_ids[i]]
+
+    def pos_names(self, name="parent", english=True, pos_tags=pos_map.POS_MAP):
+        """Gets a list of the part of speech name of every word.
+
+        See :func:`pynlpir.pos_map.get_pos_names` for a description of the
+        arguments.
+
+        """
+        names = pos_map.get_pos_names(self.pos_codes, name, english, pos_tags)
+        return [names[pos_id] for pos_id in self.pos_ids]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return (self.word(i), self.pos_code(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield (self.word(i), self.pos_codes[self.pos_ids[i]])
+
+    def close(self):
+        """Closes the memory-mapped files."""
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        for m in self._mmaps:
+            m.close()
+        self._mmaps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -4,8 +4,9 @@
 Other than argument names used in this documentation, the functions are left
 the same as they are in NLPIR.
 
-When this module is imported, the NLPIR library is imported and the functions
-listed below are exported by a :class:`ctypes.CDLL` instance.
+The NLPIR library is loaded the first time one of the functions listed below
+(or :data:`libNLPIR`) is used, not when this module is imported. The functions
+are exported by a :class:`ctypes.CDLL` instance.
 
 There is a less extensive, easier-to-use NLPIR interface directly in the
 :mod:`pynlpir` module.
@@ -16,6 +17,7 @@ allocated memory.
 
 """
 from ctypes import (
+    byref,
     c_bool,
     c_char,
     c_char_p,
@@ -25,12 +27,15 @@ from ctypes import (
     c_ulong,
     c_void_p,
     cdll,
+    memmove,
     POINTER,
+    sizeof,
     Structure,
 )
 import logging
 import os
 import sys
+import weakref
 
 logger = logging.getLogger("pynlpir.nlpir")
 
@@ -79,10 +84,115 @@ class ResultT(Structure):
     ]
 
 
+class ResultBuffer:
+    """A reusable vector of :class:`ResultT` structures for segmented text.
+
+    :meth:`process` segments text with :func:`GetParagraphProcessAWordCount`
+    and :func:`ParagraphProcessAW`, which write the results into this
+    buffer's memory instead of memory allocated by NLPIR. The same buffer can
+    be used for many texts; it only grows when a text has more words than it
+    can hold.
+
+    :param int size: The number of results the buffer can hold before it
+        needs to grow (defaults to ``1024``).
+
+    ``buffer[i]`` gets the :class:`ResultT` of the *i*-th word of the last
+    processed text. It points into the buffer instead of copying it, so it's
+    only valid until the next call to :meth:`process`.
+
+    A buffer can be used as a context manager; it's closed on exit.
+
+    """
+
+    def __init__(self, size=1024):
+        #: The :class:`ResultT` array the results are written to.
+        self.results = (ResultT * size)()
+        #: The number of results of the last processed text.
+        self.count = 0
+        # Weak references to the views returned by view().
+        self._views = []
+
+    def process(self, s, user_dict=True):
+        """Segments the Chinese text *s* and writes the results to the buffer.
+
+        :param bytes s: The Chinese text to process (encoded using the
+            encoding specified when :func:`Init` was called).
+        :param bool user_dict: Whether or not to use the user dictionary.
+            :func:`ParagraphProcessAW` always uses it, so if this is ``False``
+            the results of :func:`ParagraphProcessA` are copied into the
+            buffer instead.
+        :returns: The number of results.
+        :rtype: int
+
+        """
+        module = sys.modules[__name__]
+        if user_dict:
+            count = module.GetParagraphProcessAWordCount(s)
+            self._reserve(count)
+            if count:
+                module.ParagraphProcessAW(count, self.results)
+        else:
+            size = c_int()
+            result = module.ParagraphProcessA(s, byref(size), False)
+            count = size.value
+            self._reserve(count)
+            memmove(self.results, result, count * sizeof(ResultT))
+        self.count = count
+        return count
+
+    def _reserve(self, count):
+        """Makes sure the buffer can hold *count* results."""
+        if count > len(self.results):
+            size = max(count, 2 * len(self.results))
+            logger.debug("Growing result buffer to {0} results.".format(size))
+            self.results = (ResultT * size)()
+
+    def view(self):
+        """Gets a :class:`memoryview` of the last processed text's results.
+
+        The view's items are :class:`ResultT` structures in NLPIR's memory
+        layout, so it can be passed to code that reads them in bulk (e.g.
+        :func:`numpy.frombuffer` with a matching structured dtype) without
+        copying them. It is released when the buffer is closed.
+
+        """
+        view = memoryview(self.results)[: self.count]
+        self._views = [ref for ref in self._views if ref() is not None]
+        self._views.append(weakref.ref(view))
+        return view
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("result index out of range")
+        return self.results[i]
+
+    def close(self):
+        """Releases the buffer's views and frees its memory."""
+        for ref in self._views:
+            view = ref()
+            if view is not None:
+                view.release()
+        self._views = []
+        self.results = (ResultT * 0)()
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 def load_library(platform, is_64bit, lib_dir=LIB_DIR):
     """Loads the NLPIR library appropriate for the user's system.
 
-    This function is called automatically when this module is loaded.
+    This function is called automatically the first time :data:`libNLPIR` or
+    one of the NLPIR functions is used.
 
     :param str platform: The platform identifier for the user's system.
     :param bool is_64bit: Whether or not the user's system is 64-bit.
@@ -116,11 +226,8 @@ def load_library(platform, is_64bit, lib_dir=LIB_DIR):
 
 is_64bit = sys.maxsize > 2**32
 
-#: A :class:`ctypes.CDLL` instance for the NLPIR API library.
-libNLPIR = load_library(sys.platform, is_64bit)  # noqa: N816
-
 
-def get_func(name, argtypes=None, restype=c_int, lib=libNLPIR):
+def get_func(name, argtypes=None, restype=c_int, lib=None):
     """Retrieves the corresponding NLPIR function.
 
     :param str name: The name of the NLPIR function to get.
@@ -135,6 +242,8 @@ def get_func(name, argtypes=None, restype=c_int, lib=libNLPIR):
         callable.
 
     """
+    if lib is None:
+        lib = sys.modules[__name__].libNLPIR
     logger.debug(
         "Getting NLPIR API function: 'name': '{0}', 'argtypes': '{1}',"
         " 'restype': '{2}'.".format(name, argtypes, restype)
@@ -148,27 +257,66 @@ def get_func(name, argtypes=None, restype=c_int, lib=libNLPIR):
     return func
 
 
-# Get the exported NLPIR API functions.
-Init = get_func("NLPIR_Init", [c_char_p, c_int, c_char_p], c_bool)
-Exit = get_func("NLPIR_Exit", restype=c_bool)
-ParagraphProcess = get_func("NLPIR_ParagraphProcess", [c_char_p, c_int], c_char_p)
-ParagraphProcessA = get_func(
-    "NLPIR_ParagraphProcessA", [c_char_p, c_void_p, c_bool], POINTER(ResultT)
-)
-FileProcess = get_func("NLPIR_FileProcess", [c_char_p, c_char_p, c_int], c_double)
-ImportUserDict = get_func("NLPIR_ImportUserDict", [c_char_p], c_uint)
-AddUserWord = get_func("NLPIR_AddUserWord", [c_char_p])
-SaveTheUsrDic = get_func("NLPIR_SaveTheUsrDic")
-DelUsrWord = get_func("NLPIR_DelUsrWord", [c_char_p])
-GetKeyWords = get_func("NLPIR_GetKeyWords", [c_char_p, c_int, c_bool], c_char_p)
-GetFileKeyWords = get_func("NLPIR_GetFileKeyWords", [c_char_p, c_int, c_bool], c_char_p)
-GetNewWords = get_func("NLPIR_GetNewWords", [c_char_p, c_int, c_bool], c_char_p)
-GetFileNewWords = get_func("NLPIR_GetFileNewWords", [c_char_p, c_int, c_bool], c_char_p)
-FingerPrint = get_func("NLPIR_FingerPrint", [c_char_p], c_ulong)
-SetPOSmap = get_func("NLPIR_SetPOSmap", [c_int])
-NWI_Start = get_func("NLPIR_NWI_Start", None, c_bool)
-NWI_AddFile = get_func("NLPIR_NWI_AddFile", [c_char_p], c_bool)
-NWI_AddMem = get_func("NLPIR_NWI_AddMem", [c_char_p], c_bool)
-NWI_Complete = get_func("NLPIR_NWI_Complete", None, c_bool)
-NWI_GetResult = get_func("NLPIR_NWI_GetResult", [c_bool], c_char_p)
-NWI_Result2UserDict = get_func("NLPIR_NWI_Result2UserDict", None, c_bool)
+# The exported NLPIR API functions, mapped to their NLPIR names, argument types
+# and return types. They're retrieved by __getattr__() when first used.
+_FUNCTIONS = {
+    "Init": ("NLPIR_Init", [c_char_p, c_int, c_char_p], c_bool),
+    "Exit": ("NLPIR_Exit", None, c_bool),
+    "ParagraphProcess": ("NLPIR_ParagraphProcess", [c_char_p, c_int], c_char_p),
+    "ParagraphProcessA": (
+        "NLPIR_ParagraphProcessA",
+        [c_char_p, c_void_p, c_bool],
+        POINTER(ResultT),
+    ),
+    "GetParagraphProcessAWordCount": (
+        "NLPIR_GetParagraphProcessAWordCount",
+        [c_char_p],
+        c_int,
+    ),
+    "ParagraphProcessAW": (
+        "NLPIR_ParagraphProcessAW",
+        [c_int, POINTER(ResultT)],
+        None,
+    ),
+    "FileProcess": ("NLPIR_FileProcess", [c_char_p, c_char_p, c_int], c_double),
+    "ImportUserDict": ("NLPIR_ImportUserDict", [c_char_p], c_uint),
+    "AddUserWord": ("NLPIR_AddUserWord", [c_char_p], c_int),
+    "SaveTheUsrDic": ("NLPIR_SaveTheUsrDic", None, c_int),
+    "DelUsrWord": ("NLPIR_DelUsrWord", [c_char_p], c_int),
+    "GetKeyWords": ("NLPIR_GetKeyWords", [c_char_p, c_int, c_bool], c_char_p),
+    "GetFileKeyWords": ("NLPIR_GetFileKeyWords", [c_char_p, c_int, c_bool], c_char_p),
+    "GetNewWords": ("NLPIR_GetNewWords", [c_char_p, c_int, c_bool], c_char_p),
+    "GetFileNewWords": ("NLPIR_GetFileNewWords", [c_char_p, c_int, c_bool], c_char_p),
+    "FingerPrint": ("NLPIR_FingerPrint", [c_char_p], c_ulong),
+    "SetPOSmap": ("NLPIR_SetPOSmap", [c_int], c_int),
+    "NWI_Start": ("NLPIR_NWI_Start", None, c_bool),
+    "NWI_AddFile": ("NLPIR_NWI_AddFile", [c_char_p], c_bool),
+    "NWI_AddMem": ("NLPIR_NWI_AddMem", [c_char_p], c_bool),
+    "NWI_Complete": ("NLPIR_NWI_Complete", None, c_bool),
+    "NWI_GetResult": ("NLPIR_NWI_GetResult", [c_bool], c_char_p),
+    "NWI_Result2UserDict": ("NLPIR_NWI_Result2UserDict", None, c_bool),
+}
+
+
+def __getattr__(name):
+    """Loads the NLPIR library or one of its functions when it's first used.
+
+    The loaded object is stored in the module's namespace, so this is only
+    called once for each name.
+
+    """
+    if name == "libNLPIR":
+        value = load_library(sys.platform, is_64bit)
+    elif name in _FUNCTIONS:
+        value = get_func(*_FUNCTIONS[name])
+    else:
+        raise AttributeError(
+            "module '{0}' has no attribute '{1}'".format(__name__, name)
+        )
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Lists the module's attributes, including ones that aren't loaded yet."""
+    return sorted(set(globals()) | set(_FUNCTIONS) | {"libNLPIR"})
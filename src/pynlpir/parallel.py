@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""Parallel segmentation with a pool of worker processes.
+
+NLPIR keeps its state inside the library, so a single process can only use
+NLPIR from one thread at a time. To use more than one CPU core, a
+:class:`Pool` starts several worker processes and initializes NLPIR in each of
+them by calling :func:`pynlpir.open` with the pool's settings.
+
+Texts are sent to the workers in chunks. Results are yielded in the same order
+as the input, as soon as they are ready, and only a few chunks are in flight at
+once, so arbitrarily long iterables (e.g. generators reading from a file) can
+be processed.
+
+"""
+import collections
+import itertools
+import logging
+import multiprocessing
+
+import pynlpir
+
+logger = logging.getLogger("pynlpir.parallel")
+
+#: The default number of texts sent to a worker process at a time.
+CHUNK_SIZE = 64
+
+# The error raised by pynlpir.open() in this worker process, if any. If it
+# escaped _init_worker(), multiprocessing would keep replacing the worker and
+# the pool's results would never arrive, so it's raised for each chunk instead.
+_init_error = None
+
+
+def _init_worker(data_dir, encoding, encoding_errors, license_code):
+    """Initializes NLPIR in a worker process."""
+    global _init_error
+    try:
+        pynlpir.open(data_dir, encoding, encoding_errors, license_code)
+    except (ValueError, OSError, RuntimeError, pynlpir.LicenseError) as e:
+        _init_error = e
+
+
+def _check_worker():
+    """Raises the error that occurred while initializing NLPIR, if any."""
+    if _init_error is not None:
+        raise _init_error
+
+
+def _segment_chunk(chunk, kwargs):
+    """Segments each text in *chunk* in a worker process."""
+    _check_worker()
+    return list(pynlpir.segment_many(chunk, **kwargs))
+
+
+def _segment_spans_chunk(chunk, kwargs):
+    """Locates the words in each text in *chunk* in a worker process."""
+    _check_worker()
+    return [pynlpir.segment_spans(s, **kwargs) for s in chunk]
+
+
+def _get_key_words_chunk(chunk, kwargs):
+    """Gets the key words for each text in *chunk* in a worker process."""
+    _check_worker()
+    return [pynlpir.get_key_words(s, **kwargs) for s in chunk]
+
+
+def _chunks(iterable, size):
+    """Splits *iterable* into lists of up to *size* items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Pool:
+    """A pool of worker processes that have NLPIR initialized.
+
+    :param int processes: The number of worker processes to start (defaults to
+        the number of CPUs).
+    :param int chunk_size: The number of texts sent to a worker process at a
+        time (defaults to :data:`CHUNK_SIZE`).
+
+    The other arguments are the same as the arguments for :func:`pynlpir.open`.
+    If NLPIR fails to initialize in the worker processes, the pool's methods
+    raise the error that :func:`pynlpir.open` raised. A pool can be used as a
+    context manager::
+
+        with Pool(4) as pool:
+            for tokens in pool.segment(texts):
+                ...
+
+    """
+
+    def __init__(
+        self,
+        processes=None,
+        data_dir=pynlpir.nlpir.PACKAGE_DIR,
+        encoding=pynlpir.ENCODING,
+        encoding_errors=pynlpir.ENCODING_ERRORS,
+        license_code=None,
+        chunk_size=CHUNK_SIZE,
+    ):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.processes = processes
+        self.chunk_size = chunk_size
+        logger.debug("Starting {0} NLPIR worker processes.".format(processes))
+        self._pool = multiprocessing.Pool(
+            processes,
+            _init_worker,
+            (data_dir, encoding, encoding_errors, license_code),
+        )
+
+    def close(self):
+        """Waits for the worker processes to finish and stops them."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stops the worker processes immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def _imap(self, func, docs, kwargs, chunk_size):
+        """Calls *func* on chunks of *docs* and yields the results in order."""
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        # Only keep a couple of chunks per worker in flight so that memory use
+        # doesn't depend on the length of *docs*.
+        max_pending = self.processes * 2
+        pending = collections.deque()
+        for chunk in _chunks(docs, chunk_size):
+            pending.append(self._pool.apply_async(func, (chunk, kwargs)))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+    def segment(self, docs, chunk_size=None, **kwargs):
+        """Segments each Chinese text in *docs* using the worker processes.
+
+        This is a generator that yields one list of tokens for each item of
+        *docs*, in order. Each list is the same as what :func:`pynlpir.segment`
+        returns for that item.
+
+        :param docs: An iterable of Chinese texts to segment.
+        :param int chunk_size: The number of texts sent to a worker process at
+            a time (defaults to the pool's *chunk_size*).
+
+        Other keyword arguments (e.g. *pos_names*) are passed to
+        :func:`pynlpir.segment_many`.
+
+        """
+        return self._imap(_segment_chunk, docs, kwargs, chunk_size)
+
+    def segment_text(self, s, max_chunk=pynlpir.MAX_CHUNK, chunk_size=None, **kwargs):
+        """Segments the long Chinese text *s* using the worker processes.
+
+        *s* is split into pieces by :func:`pynlpir.split_text`, the pieces are
+        segmented in parallel, and their tokens are joined. The result is the
+        same as what ``pynlpir.segment(s, max_chunk=max_chunk)`` returns.
+
+        :param s: The Chinese text to segment.
+        :param int max_chunk: The maximum length of each piece (defaults to
+            :data:`pynlpir.MAX_CHUNK`).
+        :param int chunk_size: The number of pieces sent to a worker process
+            at a time (defaults to the pool's *chunk_size*).
+
+        Other keyword arguments (e.g. *pos_names*) are passed to
+        :func:`pynlpir.segment_many`.
+
+        """
+        pieces = (p for _, p in pynlpir.split_text(s, max_chunk) if p.strip())
+        tokens = []
+        for piece_tokens in self._imap(_segment_chunk, pieces, kwargs, chunk_size):
+            tokens.extend(piece_tokens)
+        return tokens
+
+    def segment_spans(self, s, max_chunk=pynlpir.MAX_CHUNK, chunk_size=None, **kwargs):
+        """Locates the words in the long Chinese text *s* in parallel.
+
+        Like :meth:`segment_text`, but the result is the same as what
+        ``pynlpir.segment_spans(s, max_chunk=max_chunk)`` returns: the offsets
+        of each piece's words are adjusted so that they index into *s*.
+
+        Other keyword arguments are passed to :func:`pynlpir.segment_spans`.
+
+        """
+        pieces = [
+            (start, p) for start, p in pynlpir.split_text(s, max_chunk) if p.strip()
+        ]
+        results = self._imap(
+            _segment_spans_chunk, (p for _, p in pieces), kwargs, chunk_size
+        )
+        return [
+            span._replace(start=start + span.start)
+            for (start, _), spans in zip(pieces, results)
+            for span in spans
+        ]
+
+    def segment_spans_many(self, docs, chunk_size=None, **kwargs):
+        """Locates the words in each Chinese text in *docs* in parallel.
+
+        This is a generator that yields one list of spans for each item of
+        *docs*, in order. Each list is the same as what
+        :func:`pynlpir.segment_spans` returns for that item.
+
+        :param docs: An iterable of Chinese texts to segment.
+        :param int chunk_size: The number of texts sent to a worker process at
+            a time (defaults to the pool's *chunk_size*).
+
+        Other keyword arguments are passed to :func:`pynlpir.segment_spans`.
+
+        """
+        return self._imap(_segment_spans_chunk, docs, kwargs, chunk_size)
+
+    def get_key_words(self, docs, chunk_size=None, **kwargs):
+        """Determines key words in each Chinese text in *docs*.
+
+        This is a generator that yields one list of key words for each item of
+        *docs*, in order. Each list is the same as what
+        :func:`pynlpir.get_key_words` returns for that item.
+
+        :param docs: An iterable of Chinese texts to analyze.
+        :param int chunk_size: The number of texts sent to a worker process at
+            a time (defaults to the pool's *chunk_size*).
+
+        Other keyword arguments are passed to :func:`pynlpir.get_key_words`.
+
+        """
+        return self._imap(_get_key_words_chunk, docs, kwargs, chunk_size)
+
+
+def segment(
+    docs,
+    processes=None,
+    chunk_size=CHUNK_SIZE,
+    data_dir=pynlpir.nlpir.PACKAGE_DIR,
+    encoding=pynlpir.ENCODING,
+    encoding_errors=pynlpir.ENCODING_ERRORS,
+    license_code=None,
+    **kwargs,
+):
+    """Segments each Chinese text in *docs* using a temporary :class:`Pool`.
+
+    This is a generator that yields one list of tokens for each item of
+    *docs*, in order. The worker processes are stopped once every text has
+    been segmented.
+
+    See :class:`Pool` for a description of the arguments. Other keyword
+    arguments (e.g. *pos_names*) are passed to :func:`pynlpir.segment_many`.
+
+    """
+    with Pool(
+        processes, data_dir, encoding, encoding_errors, license_code, chunk_size
+    ) as pool:
+        yield from pool.segment(docs, **kwargs)
@@ -4,7 +4,9 @@
 This module is used by :mod:`pynlpir` to format segmented words for output.
 
 """
+import collections
 import logging
+import threading
 
 
 logger = logging.getLogger("pynlpir.pos_map")
@@ -207,11 +209,13 @@ def _get_pos_name(pos_code, names="parent", english=True, pos_map=POS_MAP):
             "names must be one of 'parent', 'child', 'all', or "
             "'raw'; not '{0}'".format(names)
         )
-    logger.debug(
-        "Getting {0} POS name for '{1}' formatted as '{2}'.".format(
-            "English" if english else "Chinese", pos_code, names
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(
+            "Getting {0} POS name for '{1}' formatted as '{2}'.".format(
+                "English" if english else "Chinese", pos_code, names
+            )
         )
-    )
     if names == "raw":
         return pos_code
     pos_code = pos_code.lower()  # Issue #10
@@ -226,14 +230,16 @@ def _get_pos_name(pos_code, names="parent", english=True, pos_map=POS_MAP):
                 return None  # Issue #20
     pos = (pos_entry[1 if english else 0],)
     if names == "parent":
-        logger.debug("Part of speech name found: '{0}'".format(pos[0]))
+        if debug:
+            logger.debug("Part of speech name found: '{0}'".format(pos[0]))
         return pos[0]
     if len(pos_entry) == 3 and pos_key != pos_code:
         sub_map = pos_entry[2]
-        logger.debug(
-            "Found parent part of speech name '{0}'. Descending to "
-            "look for child name for '{1}'".format(pos_entry[1], pos_code)
-        )
+        if debug:
+            logger.debug(
+                "Found parent part of speech name '{0}'. Descending to "
+                "look for child name for '{1}'".format(pos_entry[1], pos_code)
+            )
         sub_pos = _get_pos_name(pos_code, names, english, sub_map)
 
         if names == "all":
@@ -243,13 +249,73 @@ def _get_pos_name(pos_code, names="parent", english=True, pos_map=POS_MAP):
             pos = (sub_pos,)
 
     name = pos if names == "all" else pos[-1]
-    logger.debug("Part of speech name found: '{0}'".format(name))
+    if debug:
+        logger.debug("Part of speech name found: '{0}'".format(name))
     return name
 
 
+def _get_pos_codes(pos_map):
+    """Gets every part of speech code in *pos_map* and its sub-maps."""
+    codes = []
+    for pos_code, pos_entry in pos_map.items():
+        codes.append(pos_code)
+        if len(pos_entry) == 3:
+            codes.extend(_get_pos_codes(pos_entry[2]))
+    return codes
+
+
+def _compile_pos_map(pos_map):
+    """Flattens *pos_map* into a dictionary keyed by ``(code, names, english)``.
+
+    The dictionary's values are the same as what :func:`_get_pos_name` returns.
+
+    """
+    logger.debug("Compiling part of speech map.")
+    table = {}
+    for pos_code in _get_pos_codes(pos_map):
+        for names in ("parent", "child", "all", "raw"):
+            for english in (True, False):
+                table[(pos_code, names, english)] = _get_pos_name(
+                    pos_code, names, english, pos_map
+                )
+    logger.debug("Compiled {0} part of speech names.".format(len(table)))
+    return table
+
+
+#: The maximum number of compiled part of speech maps that are kept.
+_MAX_COMPILED_POS_MAPS = 8
+
+#: Compiled part of speech maps keyed by the ``id()`` of the original map,
+#: least recently used first. The original map is kept with its compiled map
+#: so that the ``id()`` can't be reused while it's cached.
+_compiled_pos_maps = collections.OrderedDict()
+_compiled_pos_maps_lock = threading.Lock()
+
+
+def _get_compiled_pos_map(pos_map):
+    """Gets the compiled version of *pos_map*, compiling it if needed."""
+    key = id(pos_map)
+    with _compiled_pos_maps_lock:
+        entry = _compiled_pos_maps.get(key)
+        if entry is not None:
+            _compiled_pos_maps.move_to_end(key)
+            return entry[1]
+    table = _compile_pos_map(pos_map)
+    with _compiled_pos_maps_lock:
+        _compiled_pos_maps[key] = (pos_map, table)
+        if len(_compiled_pos_maps) > _MAX_COMPILED_POS_MAPS:
+            _compiled_pos_maps.popitem(last=False)
+    return table
+
+
 def get_pos_name(code, name="parent", english=True, pos_tags=POS_MAP):
     """Gets the part of speech name for *code*.
 
+    The first time a part of speech map is used, it is compiled into a flat
+    lookup table that is cached for later calls. Only the most recently used
+    maps stay compiled. Changes made to *pos_tags* after it has been used
+    won't be seen by this function.
+
     :param str code: The part of speech code to lookup, e.g. ``'nsf'``.
     :param str name: Which part of speech name to include in the output. Must
         be one of ``'parent'``, ``'child'``, ``'all'``, or ``'raw'``.
@@ -266,4 +332,78 @@ def get_pos_name(code, name="parent", english=True, pos_tags=POS_MAP):
         ``tuple`` if *name* is ``'all'``.
 
     """
-    return _get_pos_name(code, name, english, pos_tags)
+    table = _get_compiled_pos_map(pos_tags)
+    try:
+        return table[(code, name, english)]
+    except KeyError:
+        # Codes that aren't in the map as-is (e.g. 'Rg' or unknown codes) are
+        # resolved the slow way. Only other spellings of known codes are
+        # remembered, so unknown codes can't grow the table without limit.
+        pos_name = _get_pos_name(code, name, english, pos_tags)
+        if (code.lower(), name, english) in table:
+            table[(code, name, english)] = pos_name
+        return pos_name
+
+
+#: Part of speech codes interned by :func:`get_pos_id`, indexed by their IDs.
+#: The ID of a word without a part of speech is ``0``.
+POS_CODES = [None]
+
+# Maps part of speech codes (strings and encoded) to their interned IDs.
+_pos_ids = {None: 0, "": 0, b"": 0}
+_pos_ids_lock = threading.Lock()
+
+
+def get_pos_id(code):
+    """Gets the interned ID of the part of speech code *code*.
+
+    Each code gets a small integer ID the first time it's seen, so that lists
+    of codes can be stored compactly, e.g. in an :mod:`array`. The code for
+    an ID is ``POS_CODES[pos_id]``.
+
+    :param code: The part of speech code, e.g. ``'nsf'``. It can be a string
+        or ASCII encoded bytes (like the codes in NLPIR's results). An empty
+        code or :data:`None` means the word has no part of speech.
+    :returns: The code's ID.
+    :rtype: int
+
+    """
+    try:
+        return _pos_ids[code]
+    except KeyError:
+        pass
+    pos_code = code.decode("ascii", "replace") if isinstance(code, bytes) else code
+    with _pos_ids_lock:
+        try:
+            pos_id = _pos_ids[pos_code]
+        except KeyError:
+            pos_id = _pos_ids[pos_code] = len(POS_CODES)
+            POS_CODES.append(pos_code)
+        _pos_ids[code] = pos_id
+    return pos_id
+
+
+def get_pos_names(codes, name="parent", english=True, pos_tags=POS_MAP):
+    """Gets the part of speech name for each code in *codes*.
+
+    This returns the same names as calling :func:`get_pos_name` for each
+    code, but each distinct code is only looked up once, so it's much faster
+    for the codes of a whole segmented text.
+
+    :param codes: A sequence of part of speech codes (strings, or
+        :data:`None` for words without a part of speech) or of their IDs
+        from :func:`get_pos_id`, e.g. an :mod:`array` of integers.
+    :returns: A list with the name for each item of *codes* (or :data:`None`
+        if the item has no part of speech or isn't recognized).
+
+    See :func:`get_pos_name` for a description of the other arguments.
+
+    """
+    names = {}
+    for code in set(codes):
+        pos_code = POS_CODES[code] if isinstance(code, int) else code
+        if pos_code is None:
+            names[code] = None
+        else:
+            names[code] = get_pos_name(pos_code, name, english, pos_tags)
+    return [names[code] for code in codes]
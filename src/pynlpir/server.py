@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""A local server that keeps NLPIR initialized between programs.
+
+:func:`pynlpir.open` loads NLPIR's dictionaries, which takes a while. A
+:class:`Server` opens NLPIR once and answers requests on a Unix domain socket,
+so short-lived programs can use a :class:`Client` instead of initializing
+NLPIR themselves. Start a server with ``pynlpir serve`` or :func:`serve`::
+
+    client = Client()
+    tokens = client.segment('我们都是美国人。')
+
+The :class:`Client` methods return the same results as the :mod:`pynlpir`
+functions with the same names. Texts are sent to the server as strings, so
+encoded texts are decoded using :data:`pynlpir.ENCODING` first, and
+:meth:`Client.segment_spans` only accepts strings because its offsets would
+otherwise differ.
+
+Requests and responses are JSON objects, one per line. A request looks like
+``{"id": 1, "method": "segment", "args": ["我们"], "kwargs": {}}`` and its
+response like ``{"id": 1, "result": [["我们", "pronoun"]]}`` or
+``{"id": 1, "error": {"type": "RuntimeError", "message": "..."}}``. Responses
+are sent in the same order as the requests.
+
+Unix domain sockets aren't available on Windows.
+
+"""
+import builtins
+import contextlib
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+
+import pynlpir
+from pynlpir.session import Session
+
+logger = logging.getLogger("pynlpir.server")
+
+# The directory of the default socket if $XDG_RUNTIME_DIR isn't set. It's
+# created by the server and must only be accessible by the current user.
+_PRIVATE_DIR = os.path.join(tempfile.gettempdir(), "pynlpir-{0}".format(os.getuid()))
+
+#: The default path of the server's socket: ``pynlpir.sock`` in
+#: ``$XDG_RUNTIME_DIR``, or in a directory in the temporary directory that
+#: only the current user can access.
+SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or _PRIVATE_DIR, "pynlpir.sock"
+)
+
+#: The functions a client can call, by name.
+METHODS = {
+    "segment": pynlpir.segment,
+    "segment_spans": pynlpir.segment_spans,
+    "get_key_words": pynlpir.get_key_words,
+    "fingerprint": pynlpir.fingerprint,
+}
+
+# Errors that are raised by clients as the same type. Other errors are raised
+# as RuntimeError.
+_ERRORS = {
+    "LicenseError": pynlpir.LicenseError,
+    "KeyError": KeyError,
+    "TypeError": TypeError,
+    "UnicodeError": UnicodeError,
+    "ValueError": ValueError,
+}
+
+
+def _check_dir(path):
+    """Creates the private socket directory if *path* is in it.
+
+    :raises PermissionError: The private directory exists, but other users
+        can access it.
+
+    """
+    if os.path.dirname(path) != _PRIVATE_DIR:
+        return
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(_PRIVATE_DIR, 0o700)
+    st = os.lstat(_PRIVATE_DIR)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError("'{0}' is not a private directory.".format(_PRIVATE_DIR))
+
+
+def _dumps(obj):
+    """Serializes *obj* as a line of UTF-8 encoded JSON."""
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf_8")
+
+
+def _error(e):
+    """Describes the error *e* for a response."""
+    return {"type": type(e).__name__, "message": str(e)}
+
+
+def _handle_request(session, line):
+    """Handles the JSON request *line* and returns the encoded response."""
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        try:
+            func = METHODS[request["method"]]
+        except KeyError:
+            raise ValueError("Unknown method '{0}'.".format(request["method"]))
+        result = session.call(
+            func, *request.get("args", ()), **request.get("kwargs", {})
+        )
+        response = {"id": request_id, "result": result}
+    except (KeyError, TypeError, ValueError, RuntimeError, pynlpir.LicenseError) as e:
+        response = {"id": request_id, "error": _error(e)}
+    except Exception as e:  # noqa: B902
+        # Unexpected errors are sent to the client too, so that one bad
+        # request doesn't close the connection.
+        logger.exception("Request {0} failed.".format(request_id))
+        response = {"id": request_id, "error": _error(e)}
+    return _dumps(response)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests sent on one connection, in order."""
+
+    def handle(self):
+        for line in self.rfile:
+            self.wfile.write(_handle_request(self.server.session, line))
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A server that answers NLPIR requests on the Unix domain socket *path*.
+
+    Each connection is handled by its own thread. Calls are made through
+    *session*, a :class:`~pynlpir.session.Session` that must be opened before
+    the server is started, so only one thread is inside NLPIR at a time.
+
+    If a socket already exists at *path*, it is replaced. Only the current
+    user can connect to the socket. The socket file is removed when the server
+    is closed.
+
+    :raises FileExistsError: A file that isn't a socket exists at *path*.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=SOCKET_PATH, session=None):
+        self.path = path
+        self.session = Session() if session is None else session
+        _check_dir(path)
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError("'{0}' is not a socket.".format(path))
+            os.remove(path)
+        super().__init__(path, _RequestHandler)
+
+    def server_bind(self):
+        # Create the socket file without permissions for other users, so that
+        # they can't connect before its permissions are changed.
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+
+def serve(path=SOCKET_PATH, **kwargs):
+    """Opens the NLPIR API and answers requests on *path* until interrupted.
+
+    Other keyword arguments are passed to :func:`pynlpir.open`.
+
+    """
+    with Session(**kwargs) as session, Server(path, session) as server:
+        logger.info("Serving NLPIR requests on '{0}'.".format(path))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class _Connection:
+    """A connection to a server."""
+
+    def __init__(self, path, timeout):
+        _check_dir(path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(path)
+        except OSError:
+            self.socket.close()
+            raise
+        self.file = self.socket.makefile("rb")
+
+    def send(self, request):
+        """Sends the request *request*."""
+        self.socket.sendall(_dumps(request))
+
+    def receive(self):
+        """Receives the next response."""
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The PyNLPIR server closed the connection.")
+        return json.loads(line)
+
+    def close(self):
+        """Closes the connection."""
+        self.file.close()
+        self.socket.close()
+
+
+def _get_result(method, response):
+    """Gets the result of the call to *method* from *response*.
+
+    :raises: The error the call raised.
+
+    """
+    if "error" in response:
+        error = response["error"]
+        error_type = _ERRORS.get(error["type"])
+        if error_type is None:
+            error_type = getattr(builtins, error["type"], None)
+            if not isinstance(error_type, type) or not issubclass(
+                error_type, Exception
+            ):
+                error_type = RuntimeError
+        raise error_type(error["message"])
+    result = response["result"]
+    # JSON doesn't have tuples, so convert lists back to the types the
+    # pynlpir functions return.
+    if method == "segment_spans":
+        return [pynlpir.Span(*span) for span in result]
+    if isinstance(result, list):
+        return [tuple(item) if isinstance(item, list) else item for item in result]
+    return result
+
+
+class Client:
+    """A client for a :class:`Server` listening on the socket *path*.
+
+    :param str path: The path of the server's socket (defaults to
+        :data:`SOCKET_PATH`).
+    :param int pool_size: The maximum number of connections to the server
+        (defaults to ``4``). Connections are reused between calls, and a call
+        waits for a free connection if every connection is in use.
+    :param int pipeline_depth: The maximum number of requests that
+        :meth:`segment_many` and :meth:`get_key_words_many` send before
+        receiving the first response (defaults to ``32``).
+    :param float timeout: The socket timeout in seconds (defaults to
+        :data:`None`, i.e. no timeout).
+
+    A client is thread-safe and can be used as a context manager.
+
+    """
+
+    def __init__(self, path=SOCKET_PATH, pool_size=4, pipeline_depth=32, timeout=None):
+        self.path = path
+        self.pool_size = pool_size
+        self.pipeline_depth = pipeline_depth
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """Gets a connection from the pool and returns it when done.
+
+        The connection is closed instead of being returned to the pool if an
+        exception is raised, because it may have responses left to read.
+
+        """
+        self._slots.acquire()
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = _Connection(self.path, self.timeout)
+            reusable = False
+            try:
+                yield connection
+                reusable = True
+            finally:
+                if reusable:
+                    with self._lock:
+                        self._idle.append(connection)
+                else:
+                    connection.close()
+        finally:
+            self._slots.release()
+
+    def _request(self, method, args, kwargs):
+        """Builds a request to call *method*."""
+        if method == "segment_spans" and any(isinstance(a, bytes) for a in args):
+            raise TypeError("segment_spans() can't be called with encoded text.")
+        return {
+            "id": next(self._ids),
+            "method": method,
+            "args": [pynlpir._decode(a) if isinstance(a, bytes) else a for a in args],
+            "kwargs": kwargs,
+        }
+
+    def call(self, method, *args, **kwargs):
+        """Calls the function *method* (see :data:`METHODS`) on the server.
+
+        :returns: The call's result.
+        :raises ConnectionError: The server can't be reached.
+
+        """
+        with self._connection() as connection:
+            connection.send(self._request(method, args, kwargs))
+            response = connection.receive()
+        return _get_result(method, response)
+
+    def call_many(self, method, docs, **kwargs):
+        """Calls the function *method* on each item of *docs*.
+
+        This is a generator that yields the results in order. The requests are
+        pipelined: up to *pipeline_depth* requests are sent over one
+        connection before their responses are read, so the server doesn't wait
+        for the client between calls. *docs* is read by a background thread.
+
+        """
+        with self._connection() as connection:
+            depth = threading.Semaphore(self.pipeline_depth)
+            sent = queue.Queue()
+            stop = threading.Event()
+
+            def send_requests():
+                try:
+                    for s in docs:
+                        depth.acquire()
+                        if stop.is_set():
+                            return
+                        connection.send(self._request(method, (s,), kwargs))
+                        sent.put(True)
+                except Exception as e:  # noqa: B902
+                    # Any error reading *docs* or sending a request is raised
+                    # again, with its traceback, by the generator below.
+                    sent.put(e)
+                    return
+                sent.put(None)
+
+            sender = threading.Thread(target=send_requests, daemon=True)
+            sender.start()
+            finished = False
+            try:
+                while True:
+                    item = sent.get()
+                    if item is None:
+                        finished = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    response = connection.receive()
+                    depth.release()
+                    yield _get_result(method, response)
+            finally:
+                stop.set()
+                depth.release()
+                if not finished:
+                    # Unblock the sender if it's waiting for the server. The
+                    # connection is closed afterwards.
+                    connection.socket.shutdown(socket.SHUT_RDWR)
+                sender.join()
+
+    def segment(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment` on the server."""
+        return self.call("segment", s, *args, **kwargs)
+
+    def segment_spans(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment_spans` on the server.
+
+        :raises TypeError: *s* is encoded. The offsets of encoded text count
+            bytes, which can't be sent to the server.
+
+        """
+        return self.call("segment_spans", s, *args, **kwargs)
+
+    def get_key_words(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.get_key_words` on the server."""
+        return self.call("get_key_words", s, *args, **kwargs)
+
+    def fingerprint(self, s):
+        """Calls :func:`pynlpir.fingerprint` on the server."""
+        return self.call("fingerprint", s)
+
+    def segment_many(self, docs, **kwargs):
+        """Segments each Chinese text in *docs* on the server.
+
+        This is a generator that yields the same results as
+        :func:`pynlpir.segment_many`. See :meth:`call_many`.
+
+        """
+        return self.call_many("segment", docs, **kwargs)
+
+    def get_key_words_many(self, docs, **kwargs):
+        """Determines key words in each Chinese text in *docs* on the server.
+
+        This is a generator that yields one list of key words for each item of
+        *docs*, in order. See :meth:`call_many`.
+
+        """
+        return self.call_many("get_key_words", docs, **kwargs)
+
+    def close(self):
+        """Closes the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
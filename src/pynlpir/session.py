@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Thread-safe access to NLPIR.
+
+NLPIR keeps its state in a single, process-wide instance of the library, so
+its functions must not be called by more than one thread at a time. A
+:class:`Session` opens the NLPIR API and serializes calls to it with
+:data:`LOCK`.
+
+Calls made through a session are safe to make from any thread. Calls made
+directly through :mod:`pynlpir` or :mod:`pynlpir.nlpir` are not serialized;
+wrap them with :meth:`Session.call` if other threads might be using NLPIR at
+the same time.
+
+"""
+import concurrent.futures
+import logging
+import threading
+
+import pynlpir
+
+logger = logging.getLogger("pynlpir.session")
+
+#: The lock that serializes calls to NLPIR. NLPIR's state is process-wide, so
+#: this lock is shared by every :class:`Session`.
+LOCK = threading.RLock()
+
+# The session that currently has the NLPIR API open.
+_open_session = None
+
+
+class Session:
+    """A thread-safe NLPIR session.
+
+    The arguments are the same as the arguments for :func:`pynlpir.open`. The
+    NLPIR API is opened by :meth:`open` and closed by :meth:`close`; a session
+    can also be used as a context manager::
+
+        with Session() as session:
+            future = session.submit(pynlpir.segment, '我们都是美国人。')
+            print(future.result())
+
+    Every call is made while holding :data:`LOCK`, so at most one thread is
+    inside NLPIR at a time. :meth:`submit` and :meth:`map` run calls on the
+    session's worker thread. :mod:`ctypes` releases the GIL while NLPIR is
+    running, so other Python threads keep running during those calls.
+
+    Because NLPIR's encoding settings are process-wide, only one session can be
+    open at a time.
+
+    If *stats* is a :class:`pynlpir.stats.Stats` instance, profiling
+    statistics are recorded in it while the session is open (see
+    :func:`pynlpir.enable_stats`).
+
+    """
+
+    def __init__(
+        self,
+        data_dir=pynlpir.nlpir.PACKAGE_DIR,
+        encoding=pynlpir.ENCODING,
+        encoding_errors=pynlpir.ENCODING_ERRORS,
+        license_code=None,
+        stats=None,
+    ):
+        self.data_dir = data_dir
+        self.encoding = encoding
+        self.encoding_errors = encoding_errors
+        self.license_code = license_code
+        self.stats = stats
+        self._executor = None
+
+    @property
+    def is_open(self):
+        """Whether or not this session has the NLPIR API open."""
+        return self._executor is not None
+
+    # Named like pynlpir.open() on purpose.
+    def open(self):  # noqa: A003
+        """Opens the NLPIR API and starts the session's worker thread.
+
+        :raises RuntimeError: Another session is already open or NLPIR failed
+            to initialize.
+
+        """
+        global _open_session
+        with LOCK:
+            if _open_session is not None:
+                raise RuntimeError("Another NLPIR session is already open.")
+            pynlpir.open(
+                self.data_dir, self.encoding, self.encoding_errors, self.license_code
+            )
+            _open_session = self
+            if self.stats is not None:
+                pynlpir.enable_stats(self.stats)
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="pynlpir"
+            )
+        logger.debug("NLPIR session opened.")
+
+    def close(self):
+        """Waits for pending calls to finish and closes the NLPIR API."""
+        global _open_session
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        with LOCK:
+            self._executor = None
+            _open_session = None
+            if self.stats is not None:
+                pynlpir.disable_stats()
+            pynlpir.close()
+        logger.debug("NLPIR session closed.")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def call(self, func, *args, **kwargs):
+        """Calls ``func(*args, **kwargs)`` while holding :data:`LOCK`.
+
+        The call is made in the current thread.
+
+        :raises RuntimeError: The session isn't open.
+
+        """
+        with LOCK:
+            if self._executor is None:
+                raise RuntimeError("The NLPIR session is not open.")
+            return func(*args, **kwargs)
+
+    def submit(self, func, *args, **kwargs):
+        """Schedules ``func(*args, **kwargs)`` to run on the worker thread.
+
+        :returns: A :class:`concurrent.futures.Future` for the call's result.
+        :raises RuntimeError: The session isn't open.
+
+        """
+        if self._executor is None:
+            raise RuntimeError("The NLPIR session is not open.")
+        return self._executor.submit(self.call, func, *args, **kwargs)
+
+    # Named like concurrent.futures.Executor.map() on purpose.
+    def map(self, func, *iterables, timeout=None):  # noqa: A003
+        """Like :func:`map`, but the calls run on the worker thread.
+
+        The results are returned in order. See
+        :meth:`concurrent.futures.Executor.map`.
+
+        :raises RuntimeError: The session isn't open.
+
+        """
+        if self._executor is None:
+            raise RuntimeError("The NLPIR session is not open.")
+        return self._executor.map(
+            lambda *args: self.call(func, *args), *iterables, timeout=timeout
+        )
+
+    def segment(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment` while holding :data:`LOCK`."""
+        return self.call(pynlpir.segment, s, *args, **kwargs)
+
+    def segment_spans(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.segment_spans` while holding :data:`LOCK`."""
+        return self.call(pynlpir.segment_spans, s, *args, **kwargs)
+
+    def get_key_words(self, s, *args, **kwargs):
+        """Calls :func:`pynlpir.get_key_words` while holding :data:`LOCK`."""
+        return self.call(pynlpir.get_key_words, s, *args, **kwargs)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Profiling statistics for PyNLPIR's functions.
+
+Statistics are only recorded after :func:`pynlpir.enable_stats` is called::
+
+    stats = pynlpir.enable_stats()
+    pynlpir.segment('我们都是美国人。')
+    stats.as_dict()['segment']['phases']
+
+For each operation (e.g. ``'segment'``), a :class:`Stats` instance records the
+number of calls, the time spent in each phase of a call, the number of bytes
+passed to and returned by NLPIR, the number of tokens produced, and a
+histogram of call latencies. :meth:`Stats.as_dict` exports them as a
+dictionary that is easy to convert to other formats, e.g. Prometheus metrics.
+
+"""
+import bisect
+import threading
+import time
+
+#: The default upper bounds (in seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """A histogram of values with fixed bucket upper bounds *buckets*.
+
+    Values larger than every bound are counted in an extra ``+Inf`` bucket.
+
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Adds *value* to the histogram."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        """Gets the histogram as a dictionary.
+
+        The ``'buckets'`` item maps each bucket's upper bound (as a string) to
+        the number of values less than or equal to it, like a Prometheus
+        histogram.
+
+        """
+        buckets, total = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            buckets["+Inf" if bound == float("inf") else repr(bound)] = total
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class OperationStats:
+    """The statistics of one operation, e.g. ``'segment'``."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        #: The number of calls.
+        self.count = 0
+        #: The total time spent in calls, in seconds.
+        self.seconds = 0.0
+        #: The number of bytes passed to NLPIR.
+        self.bytes_in = 0
+        #: The number of bytes returned by NLPIR.
+        self.bytes_out = 0
+        #: The number of tokens (or key words) produced.
+        self.tokens = 0
+        #: The total time spent in each phase of the calls, in seconds.
+        self.phases = {}
+        #: A :class:`Histogram` of the calls' latencies.
+        self.latency = Histogram(buckets)
+
+    def as_dict(self):
+        """Gets the statistics as a dictionary."""
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "tokens": self.tokens,
+            "phases": dict(self.phases),
+            "latency": self.latency.as_dict(),
+        }
+
+
+class Timer:
+    """Times the phases of one call of *operation* for *stats*.
+
+    The clock starts when the timer is created. Each call to :meth:`phase`
+    ends a phase and starts the next one.
+
+    """
+
+    __slots__ = ("stats", "operation", "phases", "_last")
+
+    def __init__(self, stats, operation):
+        self.stats = stats
+        self.operation = operation
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def phase(self, name):
+        """Ends the phase *name*, adding the time since the last phase ended."""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def record(self, bytes_in=0, bytes_out=0, tokens=0):
+        """Records the call in :attr:`stats`. See :meth:`Stats.record`."""
+        self.stats.record(self.operation, self.phases, bytes_in, bytes_out, tokens)
+
+
+class Stats:
+    """Thread-safe profiling statistics of PyNLPIR's operations.
+
+    :param buckets: The upper bounds (in seconds) of the latency histogram
+        buckets (defaults to :data:`LATENCY_BUCKETS`).
+
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, phases, bytes_in=0, bytes_out=0, tokens=0):
+        """Records one call of *operation*.
+
+        :param str operation: The operation's name, e.g. ``'segment'``.
+        :param dict phases: The time spent in each phase of the call, in
+            seconds, e.g. ``{'nlpir': 0.01, 'format': 0.002}``. The call's
+            latency is the sum of the phases.
+        :param int bytes_in: The number of bytes passed to NLPIR.
+        :param int bytes_out: The number of bytes returned by NLPIR.
+        :param int tokens: The number of tokens produced.
+
+        """
+        seconds = sum(phases.values())
+        with self._lock:
+            try:
+                stats = self._operations[operation]
+            except KeyError:
+                stats = self._operations[operation] = OperationStats(self.buckets)
+            stats.count += 1
+            stats.seconds += seconds
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.tokens += tokens
+            for phase, phase_seconds in phases.items():
+                stats.phases[phase] = stats.phases.get(phase, 0.0) + phase_seconds
+            stats.latency.observe(seconds)
+
+    def timer(self, operation):
+        """Gets a :class:`Timer` for one call of *operation*."""
+        return Timer(self, operation)
+
+    def __getitem__(self, operation):
+        """Gets the :class:`OperationStats` of *operation*."""
+        return self._operations[operation]
+
+    def __contains__(self, operation):
+        return operation in self._operations
+
+    def as_dict(self):
+        """Gets the statistics of every operation as a dictionary.
+
+        The dictionary maps each operation's name to a dictionary with the
+        keys ``'count'``, ``'seconds'``, ``'bytes_in'``, ``'bytes_out'``,
+        ``'tokens'``, ``'phases'``, and ``'latency'``.
+
+        """
+        with self._lock:
+            return {
+                operation: stats.as_dict()
+                for operation, stats in self._operations.items()
+            }
+
+    def reset(self):
+        """Removes every recorded call."""
+        with self._lock:
+            self._operations.clear()
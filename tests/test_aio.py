@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.aio."""
+import asyncio
+import threading
+import unittest
+
+import pynlpir
+from pynlpir import aio
+
+
+class TestAsyncSession(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for pynlpir.aio.AsyncSession."""
+
+    async def asyncSetUp(self):
+        self.session = aio.AsyncSession(max_pending=2)
+        await self.session.open()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+
+    async def test_segment(self):
+        """Tests that async calls match sync calls."""
+        docs = ["我们都是美国人。", "这个句子有 空格。"] * 10
+        results = await asyncio.gather(*(self.session.segment(s) for s in docs))
+        self.assertEqual([pynlpir.segment(s) for s in docs], results)
+        self.assertEqual(
+            pynlpir.get_key_words(docs[0], weighted=True),
+            await self.session.get_key_words(docs[0], weighted=True),
+        )
+
+    async def test_backpressure(self):
+        """Tests that at most max_pending calls are queued at once."""
+        release, calls, submitted = threading.Event(), [], []
+
+        def block(i):
+            calls.append(i)
+            release.wait()
+            return i
+
+        def submit(func, *args, **kwargs):
+            submitted.append(args)
+            return session_submit(func, *args, **kwargs)
+
+        session_submit = self.session.session.submit
+        self.session.session.submit = submit
+        tasks = [asyncio.ensure_future(self.session.run(block, i)) for i in range(5)]
+        await asyncio.sleep(0.1)
+        self.assertEqual([0], calls)
+        self.assertEqual([(0,), (1,)], submitted)
+        release.set()
+        self.assertEqual(list(range(5)), await asyncio.gather(*tasks))
+
+    async def test_cancel(self):
+        """Tests that cancelled calls that haven't started don't run."""
+        release, calls = threading.Event(), []
+
+        def block(i):
+            calls.append(i)
+            release.wait()
+            return i
+
+        running = asyncio.ensure_future(self.session.run(block, 0))
+        queued = asyncio.ensure_future(self.session.run(block, 1))
+        await asyncio.sleep(0.1)
+        queued.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+        release.set()
+        self.assertEqual(0, await running)
+        self.assertEqual([0], calls)
+
+
+class TestModule(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for pynlpir.aio's module-level functions."""
+
+    async def test_functions(self):
+        """Tests that the module-level functions use the opened API."""
+        s = "我们都是美国人。"
+        with self.assertRaises(RuntimeError):
+            await aio.segment(s)
+        await aio.open(max_pending=4)
+        try:
+            self.assertEqual(pynlpir.segment(s), await aio.segment(s))
+            self.assertEqual(pynlpir.get_key_words(s), await aio.get_key_words(s))
+        finally:
+            await aio.close()
+        with self.assertRaises(RuntimeError):
+            await aio.get_key_words(s)
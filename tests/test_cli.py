@@ -1,5 +1,6 @@
 """Unit tests for pynlpir's cli.py file."""
 
+import json
 import os
 import shutil
 import stat
@@ -61,3 +62,72 @@ class TestCLI(unittest.TestCase):
             os.chmod(cwd, stat.S_IREAD)
             with self.assertRaises((IOError, OSError)):
                 cli.update_license_file(cwd)
+
+
+class TestProcessingCommands(unittest.TestCase):
+    """Unit tests for the segment and keywords commands."""
+
+    def setUp(self):
+        self.runner = CliRunner()
+        self.input = "我们都是美国人。\n\n这个句子有 空格。\n"
+
+    def tearDown(self):
+        self.runner = None
+
+    def test_segment(self):
+        """Tests that the segment command matches pynlpir.segment()."""
+        result = self.runner.invoke(cli.cli, ("segment",), input=self.input)
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(
+            "我们/pronoun 都/adverb 是/verb 美国/noun 人/noun 。/punctuation mark",
+            result.stdout.splitlines()[0],
+        )
+        self.assertEqual("", result.stdout.splitlines()[1])
+        self.assertEqual(3, len(result.stdout.splitlines()))
+
+    def test_segment_formats(self):
+        """Tests the segment command's output formats and options."""
+        result = self.runner.invoke(
+            cli.cli, ("segment", "-f", "tsv", "--no-pos"), input=self.input
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertTrue(result.stdout.startswith("我们\n都\n"))
+
+        result = self.runner.invoke(
+            cli.cli, ("segment", "-f", "jsonl", "-n", "code"), input=self.input
+        )
+        self.assertEqual(0, result.exit_code)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(3, len(records))
+        self.assertEqual(["rr", "d", "vshi", "nsf", "n", "wj"], records[0]["pos"])
+        self.assertEqual([0, 2, 3, 4, 6, 7], records[0]["offsets"])
+        self.assertEqual("美国", records[0]["words"][3])
+        self.assertEqual([], records[1]["words"])
+
+        result = self.runner.invoke(
+            cli.cli, ("segment", "-f", "jsonl", "--no-pos"), input=self.input
+        )
+        self.assertNotIn("pos", json.loads(result.stdout.splitlines()[0]))
+
+        # result.output includes standard error with every version of click.
+        result = self.runner.invoke(cli.cli, ("segment", "-s"), input=self.input)
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Processed 3 texts", result.output)
+
+    def test_keywords(self):
+        """Tests that the keywords command matches pynlpir.get_key_words()."""
+        result = self.runner.invoke(
+            cli.cli, ("keywords", "-w", "-f", "jsonl"), input=self.input
+        )
+        self.assertEqual(0, result.exit_code)
+        record = json.loads(result.stdout.splitlines()[0])
+        self.assertEqual({"key_words": ["美国"], "weights": [2.2]}, record)
+
+    def test_jobs(self):
+        """Tests that using several processes gives the same output."""
+        single = self.runner.invoke(cli.cli, ("segment",), input=self.input * 10)
+        multiple = self.runner.invoke(
+            cli.cli, ("segment", "-j", "2", "-b", "3"), input=self.input * 10
+        )
+        self.assertEqual(0, multiple.exit_code)
+        self.assertEqual(single.stdout, multiple.stdout)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.corpus."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import pynlpir
+from pynlpir import corpus
+
+TEXT = "我们都是美国人。\n\n这个句子有 空格。\r\n美国人\n" * 20
+
+
+class TestCorpus(unittest.TestCase):
+    """Unit tests for pynlpir.corpus.segment_corpus() and Corpus."""
+
+    def setUp(self):
+        pynlpir.open()
+        self.addCleanup(pynlpir.close)
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.source = os.path.join(temp_dir, "corpus.txt")
+        self.result = os.path.join(temp_dir, "corpus.seg")
+        with open(self.source, "wb") as f:
+            f.write(TEXT.encode("utf_8"))
+
+    def test_segment_corpus(self):
+        """Tests that the corpus file matches segment_spans()."""
+        b = TEXT.encode("utf_8")
+        spans = pynlpir.segment_spans(b, max_chunk=100)
+        count = corpus.segment_corpus(self.source, self.result, max_chunk=100)
+        self.assertEqual(len(spans), count)
+        with corpus.Corpus(self.result, self.source) as c:
+            self.assertEqual(count, len(c))
+            self.assertEqual([sp.start for sp in spans], list(c.starts))
+            self.assertEqual([sp.length for sp in spans], list(c.lengths))
+            codes = [sp.pos for sp in spans]
+            self.assertEqual(codes, [c.pos_code(i) for i in range(count)])
+            bounds = [(sp.start, sp.start + sp.length) for sp in spans]
+            expected = [
+                (b[start:end].decode("utf_8"), sp.pos)
+                for (start, end), sp in zip(bounds, spans)
+            ]
+            self.assertEqual(expected, list(c))
+            self.assertEqual(expected[1:3], c[1:3])
+            self.assertEqual(pynlpir.pos_map.get_pos_names(codes), c.pos_names())
+
+        with corpus.Corpus(self.result) as c:
+            self.assertEqual(count, len(c))
+            self.assertRaises(ValueError, c.word, 0)
+
+    def test_empty_corpus(self):
+        """Tests that an empty file can be segmented."""
+        open(self.source, "wb").close()
+        self.assertEqual(0, corpus.segment_corpus(self.source, self.result))
+        with corpus.Corpus(self.result, self.source) as c:
+            self.assertEqual([], list(c))
+
+    def test_invalid_files(self):
+        """Tests that files that weren't written by segment_corpus() fail."""
+        self.assertRaises(ValueError, corpus.Corpus, self.source)
+        corpus.segment_corpus(self.source, self.result)
+        with open(self.source, "ab") as f:
+            f.write(b"\n")
+        self.assertRaises(ValueError, corpus.Corpus, self.result, self.source)
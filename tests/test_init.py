@@ -13,6 +13,7 @@ DATA_DIR = os.path.join(pynlpir.nlpir.PACKAGE_DIR, "Data")
 TEST_DIR = os.path.abspath(os.path.dirname(__file__))
 LICENSE_NAME = "NLPIR.user"
 LICENSE_FILE = os.path.join(TEST_DIR, "data", LICENSE_NAME)
+NWI_FILE = os.path.join(TEST_DIR, "data", "nwi-test.txt")
 
 
 class TestNLPIR(unittest.TestCase):
@@ -83,6 +84,238 @@ class TestNLPIR(unittest.TestCase):
         self.assertEqual(expected_seg_s, seg_s)
         self.assertEqual(expected_pos_seg_s, pos_seg_s)
 
+    def test_segment_many(self):
+        """Tests that segment_many() matches segment() for each text."""
+        docs = ["我们都是美国人。", "这个句子有 空格。".encode("utf_8"), "E\n"]
+        for pos_names in (None, "parent", "all"):
+            expected = [pynlpir.segment(s, pos_names=pos_names) for s in docs]
+            seg_docs = pynlpir.segment_many(iter(docs), pos_names=pos_names)
+            self.assertEqual(expected, list(seg_docs))
+        expected = [pynlpir.segment(s, pos_tagging=False) for s in docs]
+        self.assertEqual(expected, list(pynlpir.segment_many(docs, False)))
+
+    def test_segment_spans(self):
+        """Tests that the segment_spans() function works as expected."""
+        s = " 我们都是美国人。"
+        spans = pynlpir.segment_spans(s)
+        expected_words = ["我们", "都", "是", "美国", "人", "。"]
+        expected_pos = ["rr", "d", "vshi", "nsf", "n", "wj"]
+        bounds = [(sp.start, sp.start + sp.length) for sp in spans]
+        self.assertEqual(expected_words, [s[start:end] for start, end in bounds])
+        self.assertEqual(expected_pos, [sp.pos for sp in spans])
+
+        b = s.encode("utf_8")
+        byte_spans = pynlpir.segment_spans(b)
+        bounds = [(sp.start, sp.start + sp.length) for sp in byte_spans]
+        self.assertEqual(
+            expected_words, [b[start:end].decode("utf_8") for start, end in bounds]
+        )
+
+    def test_result_buffer(self):
+        """Tests that large result buffers aren't kept for later calls."""
+        self.addCleanup(setattr, pynlpir, "_MAX_RESULT_BUFFER", 65536)
+        # New buffers hold 1024 results, so only a grown buffer is too large.
+        pynlpir._MAX_RESULT_BUFFER = 1024
+        pynlpir.segment_spans("我们")
+        self.assertIsNotNone(pynlpir._result_buffer)
+        self.assertEqual(1200, len(pynlpir.segment_spans("我们都是美国人。" * 200)))
+        self.assertIsNone(pynlpir._result_buffer)
+
+    def test_segment_bytes(self):
+        """Tests that encoded text is stripped and segmented like a string."""
+        for s in (" 我们都是美国人。\n", "\u3000我们都是美国人。\u3000", "我们"):
+            b = s.encode("utf_8")
+            self.assertEqual(pynlpir.segment(s), pynlpir.segment(b))
+            self.assertEqual(
+                pynlpir.segment(s, pos_tagging=False),
+                next(pynlpir.segment_many([b], pos_tagging=False)),
+            )
+            bounds = [
+                (sp.start, sp.start + sp.length) for sp in pynlpir.segment_spans(s)
+            ]
+            byte_bounds = [
+                (sp.start, sp.start + sp.length) for sp in pynlpir.segment_spans(b)
+            ]
+            self.assertEqual(
+                [s[start:end] for start, end in bounds],
+                [b[start:end].decode("utf_8") for start, end in byte_bounds],
+            )
+
+    def test_split_text(self):
+        """Tests that split_text() splits after sentences and keeps offsets."""
+        s = "我们都是美国人。这个句子有空格！\n我们"
+        pieces = list(pynlpir.split_text(s, 10))
+        self.assertEqual(
+            [(0, "我们都是美国人。"), (8, "这个句子有空格！\n"), (17, "我们")], pieces
+        )
+        self.assertEqual(
+            [(0, "我们都"), (3, "是美")], list(pynlpir.split_text(s[:5], 3))
+        )
+        # Pieces of text that isn't UTF-8 encoded are measured in bytes too.
+        self.addCleanup(setattr, pynlpir, "ENCODING", pynlpir.ENCODING)
+        for encoding in ("utf_8", "gbk"):
+            b = s.encode(encoding)
+            pynlpir.ENCODING = encoding
+            pieces = list(pynlpir.split_text(b, 10))
+            self.assertEqual(b, b"".join(piece for _, piece in pieces))
+            for start, piece in pieces:
+                end = start + len(piece)
+                self.assertEqual(piece, b[start:end])
+                self.assertLessEqual(len(piece), 10)
+                piece.decode(encoding)
+        self.assertRaises(ValueError, next, pynlpir.split_text(s, 0))
+
+    def test_segment_chunked(self):
+        """Tests that segment() and segment_spans() can split long texts."""
+        sentences = ["我们都是美国人。\n", "这个句子有空格。", "我们都是美国人。"]
+        s = "".join(sentences)
+        expected = [t for sentence in sentences for t in pynlpir.segment(sentence)]
+        self.assertEqual(expected, pynlpir.segment(s, max_chunk=10))
+        expected_spans = [
+            sp._replace(start=start + sp.start)
+            for start, sentence in zip((0, 9, 17), sentences)
+            for sp in pynlpir.segment_spans(sentence)
+        ]
+        self.assertEqual(expected_spans, pynlpir.segment_spans(s, max_chunk=10))
+        b = s.encode("utf_8")
+        bounds = [(sp.start, sp.start + sp.length) for sp in expected_spans]
+        byte_bounds = [
+            (sp.start, sp.start + sp.length)
+            for sp in pynlpir.segment_spans(b, max_chunk=30)
+        ]
+        self.assertEqual(
+            [s[start:end] for start, end in bounds],
+            [b[start:end].decode("utf_8") for start, end in byte_bounds],
+        )
+
+    def test_segment_tokens(self):
+        """Tests that segment_tokens() works like segment()."""
+        s = " 我们都是美国人。"
+        tokens = pynlpir.segment_tokens(s)
+        expected = pynlpir.segment(s)
+        self.assertEqual(len(expected), len(tokens))
+        self.assertEqual(expected, tokens)
+        self.assertEqual(expected, list(tokens))
+        self.assertEqual(expected[1:3], tokens[1:3])
+        self.assertEqual(expected[-1], tokens[-1])
+        self.assertEqual([w for w, p in expected], tokens.words())
+        self.assertEqual("nsf", tokens.pos_code(3))
+        self.assertIs(s, tokens.text)
+        self.assertEqual("Q", tokens.starts.typecode)
+
+        encoded = pynlpir.segment_tokens(s.encode("utf_8"), pos_names=None)
+        self.assertEqual(pynlpir.segment(s, pos_names=None), encoded)
+        self.assertEqual(tokens.pos_ids, encoded.pos_ids)
+
+    def test_segment_file(self):
+        """Tests that the segment_file() function works as expected."""
+        text = "我们都是美国人。\n\n这个句子有 空格。\r\n美国人\n"
+        with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+            f.write(text.encode("utf_8"))
+        self.addCleanup(os.remove, f.name)
+        for paragraphs in (False, True):
+            tokens = list(pynlpir.segment_file(f.name, paragraphs=paragraphs))
+            for start, (word, pos) in tokens:
+                end = start + len(word)
+                self.assertEqual(word, text[start:end])
+            self.assertEqual(("人", "noun"), tokens[-1][1])
+        tokens = list(pynlpir.segment_file(f.name, pos_tagging=False))
+        self.assertEqual((0, "我们"), tokens[0])
+
+    def test_process_file(self):
+        """Tests that the process_file() function works as expected."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source = os.path.join(temp_dir, "source.txt")
+        result = os.path.join(temp_dir, "result.txt")
+        with open(source, "wb") as f:
+            f.write("我们都是美国人。\n".encode("utf_8"))
+
+        stats = pynlpir.process_file(source, result, pos_tagging=False)
+        self.assertEqual(25, stats.bytes)
+        self.assertIsNone(stats.tokens)
+        self.assertGreater(stats.seconds, 0)
+        stats = pynlpir.process_file(source, result, False, count_tokens=True)
+        self.assertEqual(6, stats.tokens)
+        with open(result, "rb") as f:
+            words = f.read().decode("utf_8").split()
+        self.assertEqual(["我们", "都", "是", "美国", "人", "。"], words)
+
+        result_dir = os.path.join(temp_dir, "results")
+        stats = pynlpir.process_directory(temp_dir, result_dir)
+        file_names = [os.path.basename(s.source) for s in stats]
+        self.assertEqual(["result.txt", "source.txt"], file_names)
+        self.assertTrue(os.path.isfile(os.path.join(result_dir, "source.txt")))
+
+    def test_cache(self):
+        """Tests that results are cached when the cache is enabled."""
+        s = "我们都是美国人。"
+        self.assertIsNone(pynlpir.cache_info())
+        pynlpir.enable_cache(maxsize=2)
+        self.addCleanup(pynlpir.disable_cache)
+
+        tokens = pynlpir.segment(s)
+        tokens.append("changed")
+        self.assertEqual(tokens[:-1], pynlpir.segment(s))
+        self.assertEqual((1, 1, 2, 1), pynlpir.cache_info())
+        self.assertNotEqual(tokens, pynlpir.segment(s, pos_names="all"))
+        self.assertEqual(["美国"], pynlpir.get_key_words(s))
+        self.assertEqual(["美国"], pynlpir.get_key_words(s))
+        self.assertEqual((2, 3, 2, 2), pynlpir.cache_info())
+
+        # Custom part of speech maps are released with their results.
+        pos_tags = dict(pynlpir.pos_map.POS_MAP)
+        pynlpir.segment(s, pos_tags=pos_tags)
+        self.assertIn(id(pos_tags), pynlpir._cache._pos_tags)
+        pynlpir.segment(s, pos_tagging=False)
+        pynlpir.get_key_words(s)
+        self.assertNotIn(id(pos_tags), pynlpir._cache._pos_tags)
+
+        pynlpir.add_user_word("都是", "v")
+        self.assertEqual(0, pynlpir.cache_info().currsize)
+        self.assertIn("都是", pynlpir.segment(s, pos_tagging=False))
+        pynlpir.delete_user_word("都是")
+        self.assertNotIn("都是", pynlpir.segment(s, pos_tagging=False))
+
+    def test_stats(self):
+        """Tests that profiling statistics are recorded once enabled."""
+        s = "我们都是美国人。"
+        pynlpir.segment(s)
+        self.assertIsNone(pynlpir.get_stats())
+        stats = pynlpir.enable_stats()
+        self.addCleanup(pynlpir.disable_stats)
+        self.assertIs(stats, pynlpir.get_stats())
+        tokens = pynlpir.segment(s)
+        list(pynlpir.segment_many([s, s]))
+        pynlpir.get_key_words(s)
+        pynlpir.segment_spans(s)
+        recorded = stats.as_dict()
+        self.assertEqual(3, recorded["segment"]["count"])
+        self.assertEqual(3 * len(tokens), recorded["segment"]["tokens"])
+        self.assertEqual(3 * len(s.encode("utf_8")), recorded["segment"]["bytes_in"])
+        self.assertEqual(
+            {"encode", "nlpir", "format"}, set(recorded["segment"]["phases"])
+        )
+        self.assertEqual(1, recorded["get_key_words"]["count"])
+        self.assertEqual(1, recorded["segment_spans"]["count"])
+        self.assertEqual(3, recorded["segment"]["latency"]["buckets"]["+Inf"])
+        pynlpir.disable_stats()
+        pynlpir.segment(s)
+        self.assertEqual(3, stats["segment"].count)
+
+    def test_add_user_words(self):
+        """Tests that add_user_words() adds words and skips duplicates."""
+        s = "我们都是美国人。"
+        words = ["都是 v", ("美国人".encode("utf_8"), b"n"), "都是", "", "美国人 nr"]
+        for import_threshold in (1000, 1):
+            counts = pynlpir.add_user_words(words, import_threshold=import_threshold)
+            self.assertEqual((5, 2, 2), counts)
+            segments = pynlpir.segment(s, pos_names=None)
+            self.assertIn(("都是", "v"), segments)
+            self.assertIn(("美国人", "n"), segments)
+            pynlpir.delete_user_word("都是")
+            pynlpir.delete_user_word("美国人")
+
     def test_get_key_words(self):
         """Tests that the get_key_words() function works as expected."""
         s = "我们都是美国人。"
@@ -93,6 +326,77 @@ class TestNLPIR(unittest.TestCase):
         self.assertEqual(expected_key_words, key_words)
         self.assertEqual(expected_weighted_key_words, weighted_key_words)
 
+    def test_get_key_word_matrix(self):
+        """Tests that get_key_word_matrix() matches get_key_words()."""
+        docs = ["我们都是美国人。", "我们很好,你呢", "美国人"]
+        matrix = pynlpir.get_key_word_matrix(iter(docs))
+        words = sorted(matrix.vocabulary, key=matrix.vocabulary.get)
+        self.assertEqual(len(docs) + 1, len(matrix.indptr))
+        for i, s in enumerate(docs):
+            start, end = matrix.indptr[i], matrix.indptr[i + 1]
+            key_words = [
+                (words[index], round(weight, 2))
+                for index, weight in zip(
+                    matrix.indices[start:end], matrix.weights[start:end]
+                )
+            ]
+            self.assertEqual(pynlpir.get_key_words(s, weighted=True), key_words)
+        self.assertEqual("f", matrix.weights.typecode)
+
+        vocabulary = dict(matrix.vocabulary)
+        matrix = pynlpir.get_key_word_matrix(["美国"], vocabulary=vocabulary)
+        self.assertEqual(vocabulary["美国"], matrix.indices[0])
+
+    def test_new_word_discovery(self):
+        """Tests that NewWordDiscovery finds new words in texts and files."""
+        with open(NWI_FILE, encoding="utf_8") as f:
+            lines = f.read().splitlines()
+
+        with pynlpir.NewWordDiscovery(batch_size=100) as discovery:
+            discovery.add_texts(iter(lines))
+            text_words = discovery.get_results()
+        self.assertTrue(text_words)
+        for new_word in text_words:
+            self.assertIsInstance(new_word.word, str)
+            self.assertIsInstance(new_word.weight, float)
+
+        with pynlpir.NewWordDiscovery() as discovery:
+            discovery.add_file(NWI_FILE)
+            file_words = discovery.get_results()
+            discovery.add_to_user_dict()
+        self.assertEqual({w.word for w in text_words}, {w.word for w in file_words})
+        self.assertRaises(RuntimeError, discovery.add_texts, lines)
+
+        with self.assertRaises(ValueError):
+            with pynlpir.NewWordDiscovery() as discovery:
+                discovery.add_texts(lines)
+                raise ValueError
+        self.assertFalse(discovery._completed)
+
+    def test_fingerprint(self):
+        """Tests that fingerprint() and FingerprintIndex find duplicates."""
+        docs = ["我们都是美国人。", "我们很好,你呢", "我们都是美国人。"]
+        fingerprint = pynlpir.fingerprint(docs[0])
+        self.assertEqual(fingerprint, pynlpir.fingerprint(docs[2]))
+        encoded = docs[0].encode(pynlpir.ENCODING)
+        self.assertEqual(fingerprint, pynlpir.fingerprint(encoded))
+
+        index = pynlpir.fingerprint_index(iter(docs))
+        self.assertEqual(3, len(index))
+        self.assertEqual([0, 2], index.find(docs[0]))
+        self.assertEqual([1], index.add("new", docs[1]))
+        index.remove(0)
+        self.assertEqual([2], index.find(docs[0]))
+
+        index = pynlpir.FingerprintIndex(max_distance=2)
+        self.assertEqual([], index.add_fingerprint("a", 0b1011))
+        self.assertEqual(["a"], index.add_fingerprint("b", 0b0001))
+        self.assertEqual(["a"], index.find_fingerprint(0b1111))
+        index.add_fingerprint("a", 0b0011)
+        self.assertEqual(["b", "a"], index.find_fingerprint(0b0001))
+        self.assertEqual([], index.find_fingerprint(0b1110000))
+        self.assertRaises(ValueError, pynlpir.FingerprintIndex, -1)
+
     def test_double_slash(self):
         """Tests for issue #7 -- double slashes raises exception."""
         s = "转发微博 //@张明明:霸气全露"
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 """Unit tests for pynlpir.nlpir."""
 import ctypes
+import os
+import subprocess
+import sys
 import unittest
 
 import pynlpir
@@ -14,3 +17,55 @@ class TestNLPIR(unittest.TestCase):
     def test_load_library(self):
         """Tests that the load_library() function works as expected."""
         self.assertTrue(isinstance(nlpir.libNLPIR, ctypes.CDLL))
+
+    def test_lazy_load_library(self):
+        """Tests that importing PyNLPIR doesn't load the NLPIR library."""
+        code = (
+            "import pynlpir, pynlpir.nlpir, pynlpir.pos_map; "
+            "print('libNLPIR' in vars(pynlpir.nlpir))"
+        )
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(pynlpir.__file__)))
+        env = dict(os.environ, PYTHONPATH=src_dir)
+        output = subprocess.check_output([sys.executable, "-c", code], env=env)
+        self.assertEqual(b"False", output.strip())
+
+    def test_get_func(self):
+        """Tests that NLPIR functions are loaded on first use."""
+        self.assertIs(nlpir.ParagraphProcess, nlpir.ParagraphProcess)
+        self.assertEqual(ctypes.c_char_p, nlpir.ParagraphProcess.restype)
+        self.assertIn("GetKeyWords", dir(nlpir))
+        self.assertRaises(AttributeError, getattr, nlpir, "NotAFunction")
+
+
+class TestResultBuffer(unittest.TestCase):
+    """Unit tests for pynlpir.nlpir.ResultBuffer."""
+
+    def setUp(self):
+        pynlpir.open()
+        self.addCleanup(pynlpir.close)
+
+    def test_process(self):
+        """Tests that a buffer holds the results of ParagraphProcessA()."""
+        s = "我们都是美国人。这个句子有空格。".encode("utf_8")
+        size = ctypes.c_int()
+        result = nlpir.ParagraphProcessA(s, ctypes.byref(size), True)
+        expected = [
+            (result[i].start, result[i].length, result[i].sPOS)
+            for i in range(size.value)
+        ]
+        with nlpir.ResultBuffer(2) as buffer:
+            for user_dict in (True, False):
+                self.assertEqual(len(expected), buffer.process(s, user_dict))
+                words = [(r.start, r.length, r.sPOS) for r in buffer]
+                self.assertEqual(expected, words)
+            self.assertRaises(IndexError, buffer.__getitem__, len(expected))
+            view = buffer.view()
+            self.assertEqual(len(expected), len(view))
+            self.assertEqual(ctypes.sizeof(nlpir.ResultT), view.itemsize)
+
+            # Smaller results reuse the same memory.
+            results = buffer.results
+            self.assertEqual(1, buffer.process("我们".encode("utf_8")))
+            self.assertIs(results, buffer.results)
+            self.assertEqual(b"rr", buffer[-1].sPOS)
+        self.assertRaises(ValueError, len, view)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.parallel."""
+import unittest
+
+import pynlpir
+from pynlpir import parallel
+
+DOCS = ["我们都是美国人。", "这个句子有 空格。", "转发微博 //@张明明:霸气全露"] * 20
+
+
+class TestPool(unittest.TestCase):
+    """Unit tests for pynlpir.parallel.Pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        pynlpir.open()
+        cls.expected_segments = [pynlpir.segment(s, pos_names="all") for s in DOCS]
+        cls.expected_key_words = [pynlpir.get_key_words(s) for s in DOCS]
+        cls.expected_spans = [pynlpir.segment_spans(s) for s in DOCS]
+        pynlpir.close()
+
+    def test_segment(self):
+        """Tests that results match pynlpir.segment() and are in order."""
+        with parallel.Pool(2, chunk_size=7) as pool:
+            segments = list(pool.segment(iter(DOCS), pos_names="all"))
+        self.assertEqual(self.expected_segments, segments)
+
+    def test_segment_spans_many(self):
+        """Tests that results match pynlpir.segment_spans() and are in order."""
+        with parallel.Pool(2, chunk_size=7) as pool:
+            spans = list(pool.segment_spans_many(iter(DOCS)))
+        self.assertEqual(self.expected_spans, spans)
+
+    def test_get_key_words(self):
+        """Tests that results match pynlpir.get_key_words()."""
+        with parallel.Pool(2) as pool:
+            key_words = list(pool.get_key_words(DOCS, chunk_size=5))
+        self.assertEqual(self.expected_key_words, key_words)
+
+    def test_segment_function(self):
+        """Tests the parallel.segment() convenience function."""
+        segments = list(parallel.segment(DOCS, processes=2, pos_names="all"))
+        self.assertEqual(self.expected_segments, segments)
+
+    def test_segment_text(self):
+        """Tests that long texts are split and segmented in parallel."""
+        s = "".join(DOCS)
+        with parallel.Pool(2) as pool:
+            pynlpir.open()
+            try:
+                expected_tokens = pynlpir.segment(s, max_chunk=30)
+                expected_spans = pynlpir.segment_spans(s, max_chunk=30)
+            finally:
+                pynlpir.close()
+            self.assertEqual(expected_tokens, pool.segment_text(s, max_chunk=30))
+            self.assertEqual(expected_spans, pool.segment_spans(s, max_chunk=30))
+
+    def test_init_error(self):
+        """Tests that NLPIR initialization errors are raised by the pool."""
+        with parallel.Pool(2, data_dir="/nonexistent") as pool:
+            with self.assertRaises((OSError, RuntimeError, pynlpir.LicenseError)):
+                list(pool.segment(DOCS))
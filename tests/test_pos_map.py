@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 """Unit tests for pynlpir.pos_map."""
+
+import array
+import logging
 import unittest
 
 from pynlpir import pos_map
@@ -81,3 +84,96 @@ class TestPOSMap(unittest.TestCase):
     def test_xx_pos_code(self):
         """Tests for issue 17 - xx pos code."""
         self.assertEqual("string", pos_map.get_pos_name("xx"))
+
+    def test_compiled_pos_map(self):
+        """Tests that compiled lookups match the recursive lookup."""
+        for code in pos_map._get_pos_codes(pos_map.POS_MAP) + ["Rg", "Mg", "irg"]:
+            for name in ("parent", "child", "all", "raw"):
+                for english in (True, False):
+                    expected = pos_map._get_pos_name(code, name, english)
+                    pos_name = pos_map.get_pos_name(code, name, english)
+                    self.assertEqual(expected, pos_name)
+
+    def test_custom_pos_tags(self):
+        """Tests that custom part of speech tags are compiled separately."""
+        pos_tags = {"n": ("名", "custom noun", {"nr": ("人名", "custom name")})}
+        self.assertEqual("custom noun", pos_map.get_pos_name("nr", pos_tags=pos_tags))
+        self.assertEqual(
+            "custom name", pos_map.get_pos_name("nr", "child", pos_tags=pos_tags)
+        )
+        self.assertEqual("noun", pos_map.get_pos_name("nr"))
+
+    def test_invalid_name(self):
+        """Tests that an invalid name raises ValueError."""
+        self.assertRaises(ValueError, pos_map.get_pos_name, "n", "invalid")
+
+    def test_no_debug_formatting(self):
+        """Tests that debug messages aren't formatted when DEBUG is disabled."""
+
+        class Code(str):
+            formatted = 0
+
+            def __format__(self, spec):
+                Code.formatted += 1
+                return str.__format__(self, spec)
+
+        logger = logging.getLogger("pynlpir.pos_map")
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            self.assertEqual(
+                "transcribed toponym", pos_map._get_pos_name(Code("nsf"), "child")
+            )
+        finally:
+            logger.setLevel(level)
+        self.assertEqual(0, Code.formatted)
+
+        with self.assertLogs("pynlpir.pos_map", "DEBUG"):
+            pos_map._get_pos_name(Code("nsf"), "child")
+        self.assertGreater(Code.formatted, 0)
+
+    def test_debug_logging(self):
+        """Tests that debug messages are still logged when enabled."""
+        with self.assertLogs("pynlpir.pos_map", "DEBUG") as cm:
+            pos_map._get_pos_name("nsf", "child")
+        self.assertIn("transcribed toponym", cm.output[-1])
+
+    def test_get_pos_id(self):
+        """Tests that codes are interned once, whether encoded or not."""
+        pos_id = pos_map.get_pos_id("nsf")
+        self.assertEqual(pos_id, pos_map.get_pos_id(b"nsf"))
+        self.assertEqual("nsf", pos_map.POS_CODES[pos_id])
+        self.assertNotEqual(pos_id, pos_map.get_pos_id("n"))
+        self.assertEqual(0, pos_map.get_pos_id(None))
+        self.assertEqual(0, pos_map.get_pos_id(b""))
+
+    def test_get_pos_names(self):
+        """Tests that bulk lookups match get_pos_name() for each code."""
+        codes = ["rr", "d", "vshi", "nsf", None, "nsf", "Rg", "irg"]
+        for name in ("parent", "child", "all", "raw"):
+            for english in (True, False):
+                expected = [
+                    None if c is None else pos_map.get_pos_name(c, name, english)
+                    for c in codes
+                ]
+                self.assertEqual(expected, pos_map.get_pos_names(codes, name, english))
+                ids = array.array("H", [pos_map.get_pos_id(c) for c in codes])
+                self.assertEqual(expected, pos_map.get_pos_names(ids, name, english))
+        self.assertEqual([], pos_map.get_pos_names([]))
+
+    def test_compiled_pos_map_cache(self):
+        """Tests that compiled maps and unknown codes aren't kept forever."""
+        for _ in range(pos_map._MAX_COMPILED_POS_MAPS + 5):
+            pos_tags = {"n": ("名", "custom noun")}
+            self.assertEqual(
+                "custom noun", pos_map.get_pos_name("n", pos_tags=pos_tags)
+            )
+        self.assertLessEqual(
+            len(pos_map._compiled_pos_maps), pos_map._MAX_COMPILED_POS_MAPS
+        )
+
+        table = pos_map._get_compiled_pos_map(pos_map.POS_MAP)
+        self.assertIsNone(pos_map.get_pos_name("irg"))
+        self.assertNotIn(("irg", "parent", True), table)
+        self.assertEqual("pronoun", pos_map.get_pos_name("Rg"))
+        self.assertIn(("Rg", "parent", True), table)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.server."""
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import pynlpir
+
+if hasattr(socket, "AF_UNIX"):
+    from pynlpir import server
+    from pynlpir.session import Session
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets required")
+class TestServer(unittest.TestCase):
+    """Unit tests for pynlpir.server.Server and pynlpir.server.Client."""
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.path = os.path.join(temp_dir, "pynlpir.sock")
+        self.session = Session()
+        self.session.open()
+        self.server = server.Server(self.path, self.session)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = server.Client(self.path, pool_size=2, pipeline_depth=4)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.session.close()
+
+    def test_calls(self):
+        """Tests that calls through a client match direct calls."""
+        s = "我们都是美国人。"
+        self.assertEqual(self.session.segment(s), self.client.segment(s))
+        self.assertEqual(
+            self.session.segment(s, pos_names=None),
+            self.client.segment(s.encode("utf_8"), pos_names=None),
+        )
+        self.assertEqual(self.session.segment_spans(s), self.client.segment_spans(s))
+        self.assertRaises(TypeError, self.client.segment_spans, s.encode("utf_8"))
+        self.assertEqual(
+            self.session.get_key_words(s, weighted=True),
+            self.client.get_key_words(s, weighted=True),
+        )
+        self.assertEqual(
+            self.session.call(pynlpir.fingerprint, s), self.client.fingerprint(s)
+        )
+
+    def test_pipelining(self):
+        """Tests that pipelined calls return results in order."""
+        docs = ["我们都是美国人。", "这个句子有 空格。"] * 20
+        expected = [self.session.segment(s) for s in docs]
+        self.assertEqual(expected, list(self.client.segment_many(iter(docs))))
+        expected_key_words = [self.session.get_key_words(s, 10, True) for s in docs]
+        key_words = self.client.get_key_words_many(docs, max_words=10, weighted=True)
+        self.assertEqual(expected_key_words, list(key_words))
+
+        # Stopping early closes the connection instead of reusing it.
+        results = self.client.segment_many(docs)
+        self.assertEqual(expected[0], next(results))
+        results.close()
+        self.assertEqual(expected[1], self.client.segment(docs[1]))
+
+    def test_threads(self):
+        """Tests that a client can be used from many threads at once."""
+        docs = ["我们都是美国人。", "这个句子有 空格。"] * 10
+        expected = [self.session.segment(s) for s in docs]
+        results = [None] * len(docs)
+
+        def segment(i):
+            results[i] = self.client.segment(docs[i])
+
+        threads = [threading.Thread(target=segment, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(expected, results)
+        self.assertLessEqual(len(self.client._idle), 2)
+
+    def test_errors(self):
+        """Tests that errors are raised by the client."""
+        self.assertRaises(TypeError, self.client.segment, "我们", foo=True)
+        self.assertRaises(ValueError, self.client.call, "open")
+        self.assertEqual(["我们"], self.client.segment("我们", pos_tagging=False))
+
+    def test_socket_file(self):
+        """Tests that only the current user can use the socket file."""
+        self.assertEqual(0o600, os.stat(self.path).st_mode & 0o777)
+        other = os.path.join(os.path.dirname(self.path), "other.sock")
+        open(other, "w").close()
+        self.assertRaises(FileExistsError, server.Server, other, self.session)
+        self.assertTrue(os.path.isfile(other))
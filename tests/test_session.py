@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.session."""
+import concurrent.futures
+import unittest
+
+import pynlpir
+from pynlpir.session import Session
+from pynlpir.stats import Stats
+
+
+class TestSession(unittest.TestCase):
+    """Unit tests for pynlpir.session.Session."""
+
+    def setUp(self):
+        self.session = Session()
+        self.session.open()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_segment(self):
+        """Tests that calls through a session match direct calls."""
+        s = "我们都是美国人。"
+        self.assertEqual(pynlpir.segment(s), self.session.segment(s))
+        self.assertEqual(pynlpir.get_key_words(s), self.session.get_key_words(s))
+
+    def test_threads(self):
+        """Tests that the session can be used from many threads at once."""
+        docs = ["我们都是美国人。", "这个句子有 空格。"] * 50
+        expected = [pynlpir.segment(s) for s in docs]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(self.session.segment, docs))
+        self.assertEqual(expected, results)
+        futures = [self.session.submit(pynlpir.segment, s) for s in docs]
+        self.assertEqual(expected, [f.result() for f in futures])
+        self.assertEqual(expected, list(self.session.map(pynlpir.segment, docs)))
+
+    def test_one_open_session(self):
+        """Tests that only one session can be open at a time."""
+        self.assertRaises(RuntimeError, Session().open)
+
+    def test_closed_session(self):
+        """Tests that a closed session can't be used."""
+        self.session.close()
+        self.assertFalse(self.session.is_open)
+        self.assertRaises(RuntimeError, self.session.segment, "我们")
+        self.assertRaises(RuntimeError, self.session.submit, pynlpir.segment, "我们")
+        self.session.open()
+
+    def test_stats(self):
+        """Tests that a session records profiling statistics in its stats."""
+        self.session.close()
+        self.session = Session(stats=Stats())
+        self.session.open()
+        self.session.segment("我们都是美国人。")
+        self.assertIs(self.session.stats, pynlpir.get_stats())
+        self.assertEqual(1, self.session.stats["segment"].count)
+        self.session.close()
+        self.assertIsNone(pynlpir.get_stats())
+        self.session.open()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for pynlpir.stats."""
+import threading
+import unittest
+
+from pynlpir import stats
+
+
+class TestStats(unittest.TestCase):
+    """Unit tests for pynlpir.stats."""
+
+    def test_histogram(self):
+        """Tests that histogram buckets are cumulative."""
+        histogram = stats.Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(
+            {
+                "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+                "count": 4,
+                "sum": 2.65,
+            },
+            histogram.as_dict(),
+        )
+
+    def test_record(self):
+        """Tests that calls are recorded by operation."""
+        recorded = stats.Stats()
+        recorded.record("segment", {"nlpir": 0.25, "format": 0.5}, 10, 20, 3)
+        recorded.record("segment", {"nlpir": 0.25}, 5, 6, 1)
+        recorded.record("get_key_words", {"nlpir": 0.5})
+        self.assertIn("segment", recorded)
+        self.assertEqual(2, recorded["segment"].count)
+        segment = recorded.as_dict()["segment"]
+        self.assertEqual(1.0, segment["seconds"])
+        self.assertEqual({"nlpir": 0.5, "format": 0.5}, segment["phases"])
+        self.assertEqual(15, segment["bytes_in"])
+        self.assertEqual(26, segment["bytes_out"])
+        self.assertEqual(4, segment["tokens"])
+        self.assertEqual(2, segment["latency"]["buckets"]["1.0"])
+        self.assertEqual(1, recorded.as_dict()["get_key_words"]["count"])
+        recorded.reset()
+        self.assertEqual({}, recorded.as_dict())
+
+    def test_timer(self):
+        """Tests that a timer records the time spent in each phase."""
+        recorded = stats.Stats()
+        timer = recorded.timer("segment")
+        timer.phase("encode")
+        timer.phase("nlpir")
+        timer.phase("encode")
+        timer.record(1, 2, 3)
+        phases = recorded.as_dict()["segment"]["phases"]
+        self.assertEqual({"encode", "nlpir"}, set(phases))
+        self.assertTrue(all(seconds >= 0 for seconds in phases.values()))
+
+    def test_threads(self):
+        """Tests that calls can be recorded from many threads at once."""
+        recorded = stats.Stats()
+
+        def record():
+            for _ in range(1000):
+                recorded.record("segment", {"nlpir": 0.001}, tokens=1)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8000, recorded["segment"].count)
+        self.assertEqual(8000, recorded["segment"].tokens)